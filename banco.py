@@ -0,0 +1,951 @@
+"""
+Camada de Banco de Dados (SQLite) do App de OPs
+-----------------------------------------------
+- Uma conexão de escrita única, afinada (WAL, synchronous=NORMAL, cache e mmap),
+  mantida aberta durante toda a vida do app.
+- Uma conexão somente-leitura para as leituras rápidas da thread da UI, que
+  não espera pelas transações da conexão de escrita (WAL).
+- Pool de conexões somente-leitura para leitores em segundo plano.
+- Funções utilitárias (inserir/listar/carregar/salvar) usadas pelas telas.
+
+Este módulo não importa Qt: pode ser usado por scripts e tarefas em lote.
+"""
+
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import warnings
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from migracoes import VERSAO_ATUAL, migrar, versao_esquema
+
+# ==========================
+# Configurações da Aplicação
+# ==========================
+DATABASE_PATH = "producao_calcados.db"
+TAMANHOS = ["4", "4x", "5x", "6", "7", "7x", "8x", "9x", "10", "11", "12"]
+INDICE_TAMANHO = {tam: j for j, tam in enumerate(TAMANHOS)}
+GIROS = [1, 2, 3, 4, 5]
+PARES_POR_TALAO = 20  # Agora cada talão terá 20 pares
+STATUS_PENDENTE = "pendente"
+STATUS_OK = "ok"
+
+# Grade de cada tipo: (tamanho, nº de talões do tamanho por giro), na ordem dos talões
+GRADES: Dict[str, Tuple[Tuple[str, int], ...]] = {
+    "Masculino": (("7", 1), ("7x", 1), ("8x", 2), ("9x", 3), ("10", 2), ("11", 2), ("12", 1)),
+    "Feminino": (("4", 1), ("4x", 1), ("5x", 3), ("6", 3), ("7", 2), ("7x", 1), ("8x", 1)),
+}
+GRADE_PADRAO = "Feminino"  # tipos desconhecidos usam esta grade (comportamento original)
+TIPOS = list(GRADES)
+
+# Afinação das conexões
+CACHE_PAGINAS_KIB = 20000          # ~20 MiB de page cache por conexão
+MMAP_BYTES = 256 * 1024 * 1024     # até 256 MiB do arquivo mapeados em memória
+STATEMENTS_EM_CACHE = 256          # statements preparados reaproveitados por conexão
+TAMANHO_POOL_LEITURA = 4
+# WAL depende de memória compartilhada (-shm) e não funciona em pasta de rede:
+# None = automático (WAL, exceto em compartilhamento de rede); True/False força
+USAR_WAL: Optional[bool] = None
+# Sistemas de arquivos de rede reconhecidos em /proc/mounts
+SISTEMAS_DE_REDE = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "ncpfs", "afs", "9p", "fuse.sshfs"}
+
+# ========================
+# Gerenciador de Conexões
+# ========================
+
+def em_pasta_de_rede(caminho: str) -> bool:
+    """True se ``caminho`` fica num compartilhamento de rede (UNC/unidade mapeada, NFS, SMB…)."""
+    caminho = os.path.abspath(caminho)
+    if sys.platform == "win32":
+        if caminho.startswith("\\\\"):
+            return True
+        import ctypes
+
+        DRIVE_REMOTE = 4
+        return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(caminho)[0] + "\\") == DRIVE_REMOTE
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            montagens = [linha.split()[1:3] for linha in f]
+    except OSError:
+        return False  # sem /proc (macOS…): assume disco local
+    # Ponto de montagem mais longo que contém o caminho
+    tipo, maior = "", -1
+    for ponto, sistema in montagens:
+        ponto = ponto.replace("\\040", " ")
+        if (caminho == ponto or caminho.startswith(ponto.rstrip("/") + "/")) and len(ponto) > maior:
+            tipo, maior = sistema, len(ponto)
+    return tipo in SISTEMAS_DE_REDE
+
+
+def _afinar_conexao(conn: sqlite3.Connection, escrita: bool, wal: bool = True) -> None:
+    if escrita:
+        conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        conn.execute(f"PRAGMA synchronous={'NORMAL' if wal else 'FULL'}")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_PAGINAS_KIB}")
+    if wal:
+        # mmap também não é seguro sobre arquivos de rede
+        conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA foreign_keys=ON")  # talões saem junto com a OP (ON DELETE CASCADE)
+
+
+class GerenciadorConexoes:
+    """Mantém a conexão de escrita e o pool de leitura abertos durante o app.
+
+    A conexão de escrita é compartilhada e protegida por um lock usado só
+    pelas escritas; as leituras da UI (``consulta``) têm uma conexão
+    somente-leitura própria, com lock próprio, e as conexões do pool de
+    leitura são abertas em modo somente-leitura (``mode=ro``) sob demanda e
+    devolvidas ao pool após o uso.
+
+    ``wal`` (padrão ``USAR_WAL``): None liga o WAL, exceto quando o banco está
+    numa pasta de rede — aí usa o journal clássico e avisa; para várias
+    estações, o caminho certo é o modo servidor (``servidor.py``).
+    """
+
+    def __init__(
+        self, caminho: str = DATABASE_PATH, tamanho_pool: int = TAMANHO_POOL_LEITURA, wal: Optional[bool] = None
+    ):
+        self.caminho = caminho
+        self.tamanho_pool = tamanho_pool
+        wal = USAR_WAL if wal is None else wal
+        if wal is None:
+            wal = not em_pasta_de_rede(caminho)
+            if not wal:
+                warnings.warn(
+                    f"{caminho} está numa pasta de rede: WAL desligado. Para várias estações no mesmo "
+                    "banco, rode 'python servidor.py' numa máquina e abra as demais com --servidor.",
+                    RuntimeWarning,
+                    stacklevel=2,
+                )
+        self.wal = wal
+        self._lock_escrita = threading.RLock()
+        self._conn_escrita: Optional[sqlite3.Connection] = None
+        self._lock_consulta = threading.RLock()
+        self._conn_consulta: Optional[sqlite3.Connection] = None
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._abertas_leitura = 0
+        self._lock_pool = threading.Lock()
+
+    # ---- escrita ----
+    def conexao(self) -> sqlite3.Connection:
+        """Conexão de escrita compartilhada (aberta na primeira chamada)."""
+        if self._conn_escrita is None:
+            with self._lock_escrita:
+                if self._conn_escrita is None:
+                    conn = sqlite3.connect(
+                        self.caminho,
+                        check_same_thread=False,
+                        cached_statements=STATEMENTS_EM_CACHE,
+                    )
+                    _afinar_conexao(conn, escrita=True, wal=self.wal)
+                    self._conn_escrita = conn
+        return self._conn_escrita
+
+    @contextmanager
+    def escrita(self) -> Iterator[sqlite3.Connection]:
+        """Segura o lock da conexão de escrita fora de uma transação (migrações)."""
+        with self._lock_escrita:
+            yield self.conexao()
+
+    def versao_dados(self) -> Optional[int]:
+        """``PRAGMA data_version`` da conexão de escrita (muda com escritas de
+        outras conexões/processos); None se ela está ocupada numa escrita."""
+        if not self._lock_escrita.acquire(blocking=False):
+            return None
+        try:
+            return self.conexao().execute("PRAGMA data_version").fetchone()[0]
+        finally:
+            self._lock_escrita.release()
+
+    @contextmanager
+    def transacao(self) -> Iterator[sqlite3.Cursor]:
+        """Executa o bloco numa transação da conexão de escrita (commit/rollback)."""
+        with self._lock_escrita:
+            conn = self.conexao()
+            try:
+                yield conn.cursor()
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    # ---- leitura ----
+    @contextmanager
+    def consulta(self) -> Iterator[sqlite3.Cursor]:
+        """Cursor na conexão de leitura da UI, para leituras rápidas.
+
+        Não disputa o lock de escrita: com WAL, lê o último commit mesmo
+        durante uma transação aberta (lote de importação, migração…).
+        """
+        with self._lock_consulta:
+            if self._conn_consulta is None:
+                self._conn_consulta = self._abrir_leitura()
+            cursor = self._conn_consulta.cursor()
+            try:
+                yield cursor
+            finally:
+                # Solta o snapshot de leitura (statement pendente ou BEGIN explícito)
+                cursor.close()
+                if self._conn_consulta.in_transaction:
+                    self._conn_consulta.rollback()
+
+    def _abrir_leitura(self) -> sqlite3.Connection:
+        # Garante que o arquivo (e o -shm do WAL) exista antes do modo ro
+        self.conexao()
+        uri = "file:" + os.path.abspath(self.caminho).replace("\\", "/") + "?mode=ro"
+        conn = sqlite3.connect(
+            uri, uri=True, check_same_thread=False, cached_statements=STATEMENTS_EM_CACHE
+        )
+        _afinar_conexao(conn, escrita=False, wal=self.wal)
+        return conn
+
+    @contextmanager
+    def leitura(self) -> Iterator[sqlite3.Cursor]:
+        """Empresta uma conexão somente-leitura do pool (para threads de fundo)."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock_pool:
+                criar = self._abertas_leitura < self.tamanho_pool
+                if criar:
+                    self._abertas_leitura += 1
+            conn = self._abrir_leitura() if criar else self._pool.get()
+        try:
+            yield conn.cursor()
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+
+    def fechar(self) -> None:
+        with self._lock_escrita:
+            if self._conn_escrita is not None:
+                self._conn_escrita.close()
+                self._conn_escrita = None
+        with self._lock_consulta:
+            if self._conn_consulta is not None:
+                self._conn_consulta.close()
+                self._conn_consulta = None
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock_pool:
+            self._abertas_leitura = 0
+
+
+_gerenciador: Optional[GerenciadorConexoes] = None
+_lock_gerenciador = threading.Lock()
+
+
+def gerenciador() -> GerenciadorConexoes:
+    """Gerenciador de conexões do processo, criado sob demanda para DATABASE_PATH."""
+    global _gerenciador
+    if _gerenciador is None or _gerenciador.caminho != DATABASE_PATH:
+        with _lock_gerenciador:
+            if _gerenciador is None or _gerenciador.caminho != DATABASE_PATH:
+                if _gerenciador is not None:
+                    _gerenciador.fechar()
+                _gerenciador = GerenciadorConexoes(DATABASE_PATH)
+    return _gerenciador
+
+
+def fechar_conexoes() -> None:
+    global _gerenciador
+    with _lock_gerenciador:
+        if _gerenciador is not None:
+            _gerenciador.fechar()
+            _gerenciador = None
+
+# ==============
+# Banco de Dados
+# ==============
+
+def criar_banco() -> bool:
+    """Garante o esquema atual (ver ``migracoes``); True se o arquivo era novo.
+
+    Com o banco em dia, custa uma leitura de ``PRAGMA user_version``.
+    """
+    novo_banco = not os.path.exists(DATABASE_PATH)
+    conn = gerenciador().conexao()
+    if versao_esquema(conn) != VERSAO_ATUAL:
+        with gerenciador().escrita():
+            migrar(conn)
+    return novo_banco
+
+# =====================
+# Utilidades de Banco
+# =====================
+
+SQL_INSERIR_OP = "INSERT INTO ops (cliente, num_op, data_criacao, total_pares, tipo) VALUES (?, ?, ?, ?, ?)"
+SQL_INSERIR_TALAO = "INSERT INTO taloes (op_id, giro, talao_num, numeracao, quantidade) VALUES (?, ?, ?, ?, ?)"
+
+
+def _agora() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M")
+
+
+@lru_cache(maxsize=512)
+def planejar_taloes(tipo: str, total_pares: int) -> Tuple[Tuple[int, int, str, int], ...]:
+    """Plano de talões (giro, talao_num, tamanho, qtd) para um tipo e total de pares.
+
+    Os talões são distribuídos giro a giro seguindo a grade do tipo, com até
+    PARES_POR_TALAO pares cada, até esgotar o total. O resultado é memoizado.
+    """
+    grade = GRADES.get(tipo, GRADES[GRADE_PADRAO])
+    plano: List[Tuple[int, int, str, int]] = []
+    pares_restantes = total_pares
+
+    for giro in GIROS:
+        talao_num = 1
+        for tam, qtd_taloes in grade:
+            for _ in range(qtd_taloes):
+                if pares_restantes <= 0:
+                    break
+                qtd = min(PARES_POR_TALAO, pares_restantes)
+                plano.append((giro, talao_num, tam, qtd))
+                pares_restantes -= qtd
+                talao_num += 1
+        if pares_restantes <= 0:
+            break
+    return tuple(plano)
+
+
+# =================
+# Criação de OPs
+# =================
+
+Pedido = Tuple[str, int, int, str]  # (cliente, num_op, total_pares, tipo)
+LOTE_CONSULTA = 500  # valores por "IN (...)" (abaixo do limite de parâmetros do SQLite)
+
+
+def criar_op(cliente: str, num_op: int, total_pares: int, tipo: str) -> int:
+    """Cria a OP e seus talões numa única transação (um commit).
+
+    Se a geração dos talões falhar, a OP também é desfeita: não sobra OP sem
+    talões. ``sqlite3.IntegrityError`` indica Nº de OP já existente.
+    """
+    with gerenciador().transacao() as c:
+        c.execute(SQL_INSERIR_OP, (cliente, num_op, _agora(), total_pares, tipo))
+        op_id = c.lastrowid
+        c.executemany(SQL_INSERIR_TALAO, [(op_id,) + talao for talao in planejar_taloes(tipo, total_pares)])
+    return op_id
+
+
+def criar_ops_em_lote(pedidos: Sequence[Pedido]) -> List[int]:
+    """Cria várias OPs e todos os seus talões numa única transação.
+
+    As OPs entram com um executemany, os IDs são recuperados pelo num_op
+    (único) e os talões de todas as OPs entram num segundo executemany. Se
+    qualquer inserção falhar (ex.: num_op repetido) nada é gravado.
+    Retorna os IDs na ordem dos pedidos.
+    """
+    if not pedidos:
+        return []
+    data_criacao = _agora()
+    with gerenciador().transacao() as c:
+        c.executemany(
+            SQL_INSERIR_OP,
+            [(cliente, num_op, data_criacao, total_pares, tipo) for cliente, num_op, total_pares, tipo in pedidos],
+        )
+        ids_por_num: Dict[int, int] = {}
+        nums = [p[1] for p in pedidos]
+        for i in range(0, len(nums), LOTE_CONSULTA):
+            lote = nums[i:i + LOTE_CONSULTA]
+            c.execute(f"SELECT num_op, id FROM ops WHERE num_op IN ({', '.join('?' * len(lote))})", lote)
+            ids_por_num.update(c.fetchall())
+        c.executemany(
+            SQL_INSERIR_TALAO,
+            [
+                (ids_por_num[num_op],) + talao
+                for _cliente, num_op, total_pares, tipo in pedidos
+                for talao in planejar_taloes(tipo, total_pares)
+            ],
+        )
+    return [ids_por_num[n] for n in nums]
+
+
+def num_ops_existentes(nums: Iterable[int]) -> Set[int]:
+    """Quais destes números de OP já estão no banco."""
+    nums = list(nums)
+    existentes: Set[int] = set()
+    with gerenciador().consulta() as c:
+        for i in range(0, len(nums), LOTE_CONSULTA):
+            lote = nums[i:i + LOTE_CONSULTA]
+            c.execute(f"SELECT num_op FROM ops WHERE num_op IN ({', '.join('?' * len(lote))})", lote)
+            existentes.update(n for (n,) in c.fetchall())
+    return existentes
+
+
+NUM_OP_MAX = 2 ** 63 - 1  # maior INTEGER do SQLite
+DIGITOS_MAX_NUM_OP = len(str(NUM_OP_MAX))  # 19
+COLUNAS_LISTA_OPS = "id, cliente, num_op, data_criacao, total_pares"
+
+
+def _faixas_prefixo_num_op(prefixo: str) -> List[Tuple[int, int]]:
+    """Faixas [início, fim] de num_op que começam com ``prefixo`` (usam o índice único de num_op)."""
+    if prefixo.startswith("0"):
+        return [(0, 0)] if prefixo.strip("0") == "" else []
+    base = int(prefixo)
+    faixas = []
+    for extra in range(DIGITOS_MAX_NUM_OP - len(prefixo) + 1):
+        escala = 10 ** extra
+        inicio = base * escala
+        if inicio > NUM_OP_MAX:
+            break
+        faixas.append((inicio, min((base + 1) * escala - 1, NUM_OP_MAX)))
+    return faixas
+
+
+def so_digitos(texto: str) -> bool:
+    """Só dígitos ASCII 0–9 (``isdigit`` aceita "²", que ``int()`` recusa)."""
+    return texto.isascii() and texto.isdecimal()
+
+
+def _termo_fts(filtro: str) -> str:
+    # Frase entre aspas: o trigram casa a substring, sem interpretar operadores
+    return '"' + filtro.replace('"', '""') + '"'
+
+
+# Chaves de ordenação da lista: coluna -> posição na linha (id, cliente, num_op, data_criacao, total_pares)
+ORDENS_OPS = {"id": 0, "cliente": 1, "num_op": 2, "data_criacao": 3, "total_pares": 4}
+ORDEM_PADRAO = "data_criacao"
+
+
+def chave_pagina(linha: Tuple, ordem: str = ORDEM_PADRAO) -> Tuple:
+    """Chave keyset (valor da ordenação, id) da última linha de uma página."""
+    return (linha[ORDENS_OPS[ordem]], linha[0])
+
+
+def consultar_ops(
+    c: sqlite3.Cursor,
+    filtro: str = "",
+    limite: Optional[int] = None,
+    deslocamento: int = 0,
+    ordem: Optional[str] = None,
+    decrescente: bool = True,
+    apos: Optional[Tuple] = None,
+) -> List[Tuple]:
+    """Executa a consulta da lista de OPs no cursor dado (UI ou pool de leitura).
+
+    Com ``ordem`` (ou sem filtro) a lista é paginada por keyset: ``apos`` é a
+    ``chave_pagina`` da última linha da página anterior e, sem filtro, a busca
+    segue pelo índice ``(coluna, id)``, sem ordenar nem pular linhas. Com
+    filtro de 3+ caracteres, parte das OPs encontradas (faixas de num_op +
+    FTS5) e ordena só elas: percorrer o índice da ordenação custaria o índice
+    inteiro quando os resultados são raros. Filtros curtos (LIKE, que casam
+    com muitas OPs) seguem pelo índice da ordenação até encher a página.
+
+    Com filtro e sem ``ordem`` o resultado vem por relevância: primeiro as OPs
+    cujo Nº começa com o filtro (faixas no índice de num_op), depois os clientes
+    encontrados no índice FTS5 (trigram); aqui a paginação é por ``deslocamento``.
+    """
+    faixas = _faixas_prefixo_num_op(filtro) if so_digitos(filtro) else []
+    cond_num = " OR ".join(["num_op BETWEEN ? AND ?"] * len(faixas)) or "0"
+    params_num: Tuple = tuple(v for faixa in faixas for v in faixa)
+
+    if len(filtro) >= 3:
+        # rank (bm25) é negativo: menor = mais relevante
+        fonte_cliente = "SELECT rowid AS id, rank AS relevancia FROM ops_busca WHERE ops_busca MATCH ?"
+        param_cliente: Tuple = (_termo_fts(filtro),)
+    else:
+        # O trigram precisa de 3+ caracteres; filtros curtos caem no LIKE
+        fonte_cliente = "SELECT id, 0 AS relevancia FROM ops WHERE cliente LIKE ?"
+        param_cliente = (f"%{filtro}%",)
+
+    pagina = ""
+    params_pagina: Tuple = ()
+    if limite is not None:
+        pagina = " LIMIT ? OFFSET ?"
+        params_pagina = (limite, deslocamento)
+
+    if filtro and ordem is None:
+        por_cliente = f"""
+            SELECT o.id, o.cliente, o.num_op, o.data_criacao, o.total_pares, 1 AS grupo, b.relevancia
+            FROM ({fonte_cliente}) AS b JOIN ops o ON o.id = b.id
+        """
+        if faixas:
+            por_cliente = f"""
+                SELECT {COLUNAS_LISTA_OPS}, 0 AS grupo, num_op AS relevancia
+                FROM ops WHERE {cond_num}
+                UNION ALL
+                {por_cliente} WHERE NOT ({cond_num.replace("num_op", "o.num_op")})
+            """
+            params = params_num + param_cliente + params_num
+        else:
+            # Filtro não numérico: sem o ramo de num_op (um "WHERE 0" ainda varre ops)
+            params = param_cliente
+        c.execute(
+            f"SELECT {COLUNAS_LISTA_OPS} FROM ({por_cliente}) ORDER BY grupo, relevancia, data_criacao DESC"
+            + pagina,
+            params + params_pagina,
+        )
+        return c.fetchall()
+
+    ordem = ordem or ORDEM_PADRAO
+    if ordem not in ORDENS_OPS:
+        raise ValueError(f"Ordenação inválida: {ordem}")
+    sentido = "DESC" if decrescente else "ASC"
+    por_encontrados = len(filtro) >= 3
+    # "+coluna" tira o índice da ordenação do páreo: o plano parte dos ids encontrados
+    coluna = f"+{ordem}" if por_encontrados else ordem
+    condicoes: List[str] = []
+    params: Tuple = ()
+    if por_encontrados:
+        encontrados = f"SELECT id FROM ({fonte_cliente})"
+        if faixas:
+            encontrados += f" UNION SELECT id FROM ops WHERE {cond_num}"
+        condicoes.append(f"id IN ({encontrados})")
+        params += param_cliente + params_num
+    elif filtro:
+        condicoes.append(f"({cond_num} OR id IN (SELECT id FROM ({fonte_cliente})))")
+        params += params_num + param_cliente
+    if apos is not None:
+        condicoes.append(f"({coluna}, id) {'<' if decrescente else '>'} (?, ?)")
+        params += tuple(apos)
+    where = (" WHERE " + " AND ".join(condicoes)) if condicoes else ""
+    c.execute(
+        f"SELECT {COLUNAS_LISTA_OPS} FROM ops{where} ORDER BY {coluna} {sentido}, id {sentido}" + pagina,
+        params + params_pagina,
+    )
+    return c.fetchall()
+
+
+def listar_ops(
+    filtro: str = "",
+    limite: Optional[int] = None,
+    deslocamento: int = 0,
+    ordem: Optional[str] = None,
+    decrescente: bool = True,
+    apos: Optional[Tuple] = None,
+) -> List[Tuple]:
+    """OPs (id, cliente, num_op, data_criacao, total_pares); ver ``consultar_ops``."""
+    with gerenciador().consulta() as c:
+        return consultar_ops(c, filtro, limite, deslocamento, ordem, decrescente, apos)
+
+
+SQL_CARREGAR_OP = "SELECT cliente, num_op, data_criacao, total_pares, tipo FROM ops WHERE id = ?"
+
+
+def carregar_op(op_id: int) -> Optional[Tuple]:
+    """Cabeçalho da OP: (cliente, num_op, data_criacao, total_pares, tipo) ou None."""
+    with gerenciador().consulta() as c:
+        c.execute(SQL_CARREGAR_OP, (op_id,))
+        return c.fetchone()
+
+
+def excluir_op(op_id: int) -> None:
+    """Apaga a OP; os talões vão junto pela FK em cascata."""
+    with gerenciador().transacao() as c:
+        c.execute("DELETE FROM ops WHERE id = ?", (op_id,))
+    cache_ops.invalidar(op_id)
+
+
+SQL_CARREGAR_TALOES = (
+    "SELECT giro, talao_num, numeracao, quantidade FROM taloes WHERE op_id = ? ORDER BY giro, talao_num"
+)
+
+
+def carregar_taloes(op_id: int) -> Dict[int, "TaloesGiro"]:
+    """Retorna {giro: TaloesGiro} com os talões de cada giro em ordem de talão."""
+    with gerenciador().consulta() as c:
+        c.execute(SQL_CARREGAR_TALOES, (op_id,))
+        return TaloesGiro.de_linhas(c)
+
+# ==============================
+# Estrutura compacta dos talões
+# ==============================
+
+class TaloesGiro:
+    """Talões de um GIRO numa matriz plana talão × tamanho (``array('H')``).
+
+    ``taloes[r]`` é o número do talão da linha ``r`` e a quantidade do tamanho
+    ``TAMANHOS[j]`` fica em ``qtd[r * len(TAMANHOS) + j]``. Tamanhos fora de
+    TAMANHOS não têm coluna na grade e são ignorados.
+    """
+
+    __slots__ = ("taloes", "qtd")
+
+    def __init__(self, taloes: Optional[array] = None, qtd: Optional[array] = None):
+        self.taloes = taloes if taloes is not None else array("H")
+        self.qtd = qtd if qtd is not None else array("H")
+
+    @classmethod
+    def de_linhas(cls, linhas) -> Dict[int, "TaloesGiro"]:
+        """Monta {giro: TaloesGiro} a partir de (giro, talao_num, numeracao, qtd) ordenadas."""
+        n = len(TAMANHOS)
+        zeros = array("H", bytes(2 * n))
+        giros = {g: cls() for g in GIROS}
+        atual: Optional[TaloesGiro] = None
+        chave_atual = None
+        for giro, talao_num, numeracao, quantidade in linhas:
+            if (giro, talao_num) != chave_atual:
+                chave_atual = (giro, talao_num)
+                atual = giros.setdefault(giro, cls())
+                atual.taloes.append(talao_num)
+                atual.qtd.extend(zeros)
+            j = INDICE_TAMANHO.get(numeracao)
+            if j is not None:
+                atual.qtd[(len(atual.taloes) - 1) * n + j] = quantidade
+        return giros
+
+    def copia(self) -> "TaloesGiro":
+        return TaloesGiro(array("H", self.taloes), array("H", self.qtd))
+
+    def __len__(self) -> int:
+        return len(self.taloes)
+
+    def linha(self, r: int) -> array:
+        n = len(TAMANHOS)
+        return self.qtd[r * n:(r + 1) * n]
+
+    def somas_linhas(self) -> array:
+        """Total de pares de cada talão."""
+        n = len(TAMANHOS)
+        return array("L", (sum(self.qtd[i:i + n]) for i in range(0, len(self.qtd), n)))
+
+    def somas_colunas(self) -> array:
+        """Total de pares de cada tamanho (na ordem de TAMANHOS)."""
+        n = len(TAMANHOS)
+        return array("L", (sum(self.qtd[j::n]) for j in range(n)))
+
+    def total(self) -> int:
+        return sum(self.qtd)
+
+    def taloes_invalidos(self, pares: int = PARES_POR_TALAO) -> List[Tuple[int, int]]:
+        """(talao_num, soma) dos talões que não somam ``pares``."""
+        return [(t, soma) for t, soma in zip(self.taloes, self.somas_linhas()) if soma != pares]
+
+
+SQL_UPSERT_CELULA = """
+    INSERT INTO taloes (op_id, giro, talao_num, numeracao, quantidade) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (op_id, giro, talao_num, numeracao) DO UPDATE SET quantidade = excluded.quantidade
+"""
+
+Celula = Tuple[int, int, str]  # (giro, talao_num, tamanho)
+
+
+def salvar_taloes(op_id: int, alteracoes: Dict[Celula, int]) -> int:
+    """Grava apenas as células alteradas, num único lote (UPSERT) e numa transação.
+
+    Tamanhos que ainda não tinham linha no talão são inseridos. Retorna o
+    número de células gravadas.
+    """
+    if not alteracoes:
+        return 0
+    with gerenciador().transacao() as c:
+        c.executemany(
+            SQL_UPSERT_CELULA,
+            [(op_id, giro, talao_num, numeracao, quantidade)
+             for (giro, talao_num, numeracao), quantidade in alteracoes.items()],
+        )
+    cache_ops.invalidar(op_id)
+    return len(alteracoes)
+
+# =================
+# Status dos Talões
+# =================
+
+SQL_DEFINIR_STATUS = """
+    INSERT INTO status_taloes (op_id, giro, talao_num, status, alterado_em) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (op_id, giro, talao_num) DO UPDATE
+    SET status = excluded.status, alterado_em = excluded.alterado_em
+    WHERE status <> excluded.status
+"""
+
+StatusTalao = Tuple[str, Optional[str]]  # (status, alterado_em)
+SQL_CARREGAR_STATUS = "SELECT giro, talao_num, status, alterado_em FROM status_taloes WHERE op_id = ?"
+
+
+def definir_status_talao(op_id: int, giro: int, talao_num: int, status: str) -> str:
+    """Grava o status do talão num único UPSERT; retorna o momento da gravação.
+
+    Repetir o status atual não altera nada. A transição fica registrada em
+    ``historico_status`` pelos triggers da tabela.
+    """
+    if status not in (STATUS_PENDENTE, STATUS_OK):
+        raise ValueError(f"Status inválido: {status}")
+    momento = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with gerenciador().transacao() as c:
+        c.execute(SQL_DEFINIR_STATUS, (op_id, giro, talao_num, status, momento))
+    cache_ops.invalidar(op_id)
+    return momento
+
+
+def carregar_status(op_id: int) -> Dict[Tuple[int, int], StatusTalao]:
+    """{(giro, talao_num): (status, alterado_em)} dos talões com status gravado.
+
+    Talões ausentes estão pendentes desde a criação da OP.
+    """
+    with gerenciador().consulta() as c:
+        c.execute(SQL_CARREGAR_STATUS, (op_id,))
+        return {(giro, talao_num): (status, momento) for giro, talao_num, status, momento in c}
+
+
+def historico_status(op_id: int, giro: int, talao_num: int) -> List[Tuple[str, str]]:
+    """Transições (status, momento) do talão, da mais antiga à mais recente."""
+    with gerenciador().consulta() as c:
+        c.execute(
+            "SELECT status, momento FROM historico_status WHERE op_id = ? AND giro = ? AND talao_num = ? "
+            "ORDER BY id",
+            (op_id, giro, talao_num),
+        )
+        return c.fetchall()
+
+# =========
+# Agregados
+# =========
+
+class ResumoOP(NamedTuple):
+    """Pares da OP (total, ok) no todo, por giro e por tamanho."""
+
+    pares: int
+    pares_ok: int
+    por_giro: Dict[int, Tuple[int, int]]
+    por_tamanho: Dict[str, Tuple[int, int]]
+
+    @property
+    def pendentes(self) -> int:
+        return self.pares - self.pares_ok
+
+
+SQL_RESUMO_OP = "SELECT giro, numeracao, status, pares FROM agregados WHERE op_id = ?"
+
+
+def resumo_op(op_id: int) -> ResumoOP:
+    """Totais gravados da OP, lidos da tabela ``agregados`` (mantida por triggers)."""
+    pares = pares_ok = 0
+    por_giro: Dict[int, List[int]] = {}
+    por_tamanho: Dict[str, List[int]] = {}
+    with gerenciador().consulta() as c:
+        c.execute(SQL_RESUMO_OP, (op_id,))
+        for giro, numeracao, status, n in c:
+            ok = n if status == STATUS_OK else 0
+            pares += n
+            pares_ok += ok
+            for chave, destino in ((giro, por_giro), (numeracao, por_tamanho)):
+                soma = destino.setdefault(chave, [0, 0])
+                soma[0] += n
+                soma[1] += ok
+    return ResumoOP(
+        pares, pares_ok,
+        {giro: tuple(v) for giro, v in sorted(por_giro.items())},
+        {tam: tuple(por_tamanho[tam]) for tam in TAMANHOS if tam in por_tamanho},
+    )
+
+
+def consultar_progresso(c: sqlite3.Cursor, op_ids: Sequence[int]) -> Dict[int, Tuple[int, int]]:
+    """{op_id: (pares, pares_ok)} por chave primária de ``resumo_ops``, no cursor dado.
+
+    OPs sem talões não aparecem (contam como 0).
+    """
+    progresso: Dict[int, Tuple[int, int]] = {}
+    ids = list(op_ids)
+    for i in range(0, len(ids), LOTE_CONSULTA):
+        lote = ids[i:i + LOTE_CONSULTA]
+        c.execute(
+            f"SELECT op_id, pares, pares_ok FROM resumo_ops WHERE op_id IN ({', '.join('?' * len(lote))})",
+            lote,
+        )
+        progresso.update((op_id, (pares, ok)) for op_id, pares, ok in c)
+    return progresso
+
+
+def progresso_ops(op_ids: Sequence[int]) -> Dict[int, Tuple[int, int]]:
+    """Progresso das OPs; ver ``consultar_progresso``."""
+    with gerenciador().consulta() as c:
+        return consultar_progresso(c, op_ids)
+
+
+# =======
+# Painel
+# =======
+
+LinhaPainel = Tuple[str, int, int]  # (chave, pares, pares_ok)
+
+
+class Painel(NamedTuple):
+    pares: int
+    pares_ok: int
+    por_cliente: List[LinhaPainel]
+    por_tipo: List[LinhaPainel]
+    por_tamanho: List[LinhaPainel]
+    por_dia: List[LinhaPainel]
+    por_semana: List[LinhaPainel]
+
+
+def painel_producao() -> Painel:
+    """Totais de todas as OPs a partir de ``rollups`` (mantida por triggers).
+
+    Dias e semanas são os da criação da OP; as semanas (ISO) saem da soma dos
+    dias, que já vêm agregados.
+    """
+    dimensoes: Dict[str, List[LinhaPainel]] = {}
+    with gerenciador().consulta() as c:
+        c.execute("SELECT dimensao, chave, pares, pares_ok FROM rollups WHERE pares <> 0 OR pares_ok <> 0")
+        for dimensao, chave, pares, pares_ok in c:
+            dimensoes.setdefault(dimensao, []).append((chave, pares, pares_ok))
+
+    semanas: Dict[str, List[int]] = {}
+    for dia, pares, pares_ok in dimensoes.get("dia", []):
+        ano, semana, _ = date.fromisoformat(dia).isocalendar()
+        soma = semanas.setdefault(f"{ano}-S{semana:02d}", [0, 0])
+        soma[0] += pares
+        soma[1] += pares_ok
+
+    por_tipo = sorted(dimensoes.get("tipo", []))
+    return Painel(
+        sum(p for _, p, _ in por_tipo),
+        sum(ok for _, _, ok in por_tipo),
+        sorted(dimensoes.get("cliente", []), key=lambda linha: (-linha[1], linha[0])),
+        por_tipo,
+        sorted(dimensoes.get("tamanho", []), key=lambda linha: INDICE_TAMANHO.get(linha[0], len(TAMANHOS))),
+        sorted(dimensoes.get("dia", []), reverse=True),
+        sorted(((s, p, ok) for s, (p, ok) in semanas.items()), reverse=True),
+    )
+
+
+# ============
+# Cache de OPs
+# ============
+
+CACHE_OPS_BYTES = 16 * 1024 * 1024  # teto (estimado) da memória das OPs em cache
+_BYTES_FIXOS_OP = 1024               # estimativa por OP: cabeçalho, dicts, objetos
+_BYTES_POR_STATUS = 160              # estimativa por entrada de status
+
+
+class OPCarregada(NamedTuple):
+    """Tudo o que a tela de uma OP precisa: cabeçalho, talões e status.
+
+    ``giros`` é compartilhado com o cache: quem for editar trabalha numa
+    ``TaloesGiro.copia()`` (como o GiroTableModel já faz).
+    """
+
+    cabecalho: Tuple  # (cliente, num_op, data_criacao, total_pares, tipo)
+    giros: Dict[int, "TaloesGiro"]
+    status: Dict[Tuple[int, int], StatusTalao]
+
+
+class CacheOPs:
+    """LRU de OPs carregadas, por op_id, limitado por uma estimativa de bytes.
+
+    As escritas deste processo invalidam a OP afetada (``invalidar``); criar
+    OPs (inclusive na importação) não invalida nada, pois os ids são novos
+    (AUTOINCREMENT nunca reutiliza). Escritas
+    de outras conexões/processos (importação pela linha de comando, outro app
+    no mesmo banco) mudam ``PRAGMA data_version`` da conexão de escrita, e
+    então o cache inteiro é descartado na próxima consulta.
+
+    Uma escrita que cai durante a carga de uma OP invalida antes de a carga
+    guardar o resultado (já velho): por isso cada OP tem uma geração,
+    incrementada em ``invalidar``, e ``guardar`` descarta o resultado se a
+    geração mudou desde o início da carga. Enquanto a
+    conexão de escrita está ocupada, a versão não pode ser conferida e o
+    cache é ignorado (a OP vem do banco), em vez de esperar pela escrita.
+    """
+
+    def __init__(self, limite_bytes: int = CACHE_OPS_BYTES):
+        self.limite_bytes = limite_bytes
+        self._itens: "OrderedDict[int, Tuple[OPCarregada, int]]" = OrderedDict()
+        self._bytes = 0
+        self._versao_dados: Optional[int] = None
+        # op_id -> nº de invalidações (nunca volta a zero, senão uma carga antiga passaria)
+        self._geracoes: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _tamanho(op: OPCarregada) -> int:
+        arrays = sum(
+            g.taloes.itemsize * len(g.taloes) + g.qtd.itemsize * len(g.qtd) for g in op.giros.values()
+        )
+        return _BYTES_FIXOS_OP + arrays + _BYTES_POR_STATUS * len(op.status)
+
+    def _conferir_versao(self) -> bool:
+        """Descarta o cache se outra conexão escreveu; False se não deu para conferir."""
+        versao = gerenciador().versao_dados()
+        if versao is None:
+            return False
+        with self._lock:
+            if versao != self._versao_dados:
+                self._itens.clear()
+                self._bytes = 0
+                self._versao_dados = versao
+        return True
+
+    def obter(self, op_id: int) -> Optional[OPCarregada]:
+        if not self._conferir_versao():
+            return None
+        with self._lock:
+            item = self._itens.get(op_id)
+            if item is None:
+                return None
+            self._itens.move_to_end(op_id)
+            return item[0]
+
+    def geracao(self, op_id: int) -> int:
+        """Geração atual da OP: tomada antes de ler o banco, volta em ``guardar``."""
+        with self._lock:
+            return self._geracoes.get(op_id, 0)
+
+    def guardar(self, op_id: int, op: OPCarregada, geracao: int) -> None:
+        tamanho = self._tamanho(op)
+        with self._lock:
+            if self._geracoes.get(op_id, 0) != geracao:
+                return  # a OP foi escrita durante a carga: o resultado pode ser velho
+            antigo = self._itens.pop(op_id, None)
+            if antigo is not None:
+                self._bytes -= antigo[1]
+            if tamanho > self.limite_bytes:
+                return
+            self._itens[op_id] = (op, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.limite_bytes:
+                _, (_, liberado) = self._itens.popitem(last=False)
+                self._bytes -= liberado
+
+    def invalidar(self, op_id: int) -> None:
+        with self._lock:
+            self._geracoes[op_id] = self._geracoes.get(op_id, 0) + 1
+            item = self._itens.pop(op_id, None)
+            if item is not None:
+                self._bytes -= item[1]
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+
+cache_ops = CacheOPs()
+
+
+def carregar_op_completa(op_id: int) -> Optional[OPCarregada]:
+    """Cabeçalho, talões e status da OP, do cache quando possível (None se não existe).
+
+    O dicionário de status devolvido é uma cópia: a tela pode alterá-lo.
+    """
+    op = cache_ops.obter(op_id)
+    if op is None:
+        geracao = cache_ops.geracao(op_id)
+        with gerenciador().consulta() as c:
+            # Uma transação de leitura: as três consultas veem o mesmo estado da OP
+            c.execute("BEGIN")
+            cabecalho = c.execute(SQL_CARREGAR_OP, (op_id,)).fetchone()
+            if cabecalho is None:
+                return None
+            giros = TaloesGiro.de_linhas(c.execute(SQL_CARREGAR_TALOES, (op_id,)))
+            c.execute(SQL_CARREGAR_STATUS, (op_id,))
+            status = {(giro, talao_num): (st, momento) for giro, talao_num, st, momento in c}
+        op = OPCarregada(cabecalho, giros, status)
+        cache_ops.guardar(op_id, op, geracao)
+    return op._replace(status=dict(op.status))
@@ -0,0 +1,180 @@
+"""
+Diagnóstico dos Planos de Consulta
+----------------------------------
+Passa as consultas quentes do app (lista/busca de OPs em todas as ordenações,
+carga dos talões e do resumo, exportações e a exclusão em cascata) por
+``EXPLAIN QUERY PLAN`` e aponta as que fazem varredura completa — da tabela
+ou de um índice inteiro (``SCAN ... USING INDEX`` sem restrição de busca) —,
+sinal de índice faltando ou de uma consulta que deixou de usá-lo.
+
+Única exceção: a varredura no nível de cima de uma página sem filtro
+(``ORDER BY ... LIMIT`` sem ``WHERE``) que já sai na ordem do índice (sem
+B-tree temporária), pois para no LIMIT. Com filtro, percorre o índice até achar
+o LIMIT de linhas — o índice inteiro quando elas são raras. Varreduras dentro de subconsultas nunca são isentas. Varreduras
+inevitáveis e conhecidas ficam em ``VARREDURAS_ACEITAS``, com o motivo.
+
+As consultas da lista são capturadas executando ``consultar_ops`` de verdade
+(com ``set_trace_callback``), então o SQL verificado é o mesmo que a tela usa.
+Plano vazio também é erro: sinal de que o SQL capturado não é a consulta.
+
+Uso sem interface:  python diagnostico.py [--banco producao_calcados.db] [-v]
+(código de saída 1 se alguma consulta quente varrer uma tabela ou índice inteiro)
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+import banco
+from banco import (
+    COLUNAS_LISTA_OPS, ORDENS_OPS, SQL_CARREGAR_TALOES, SQL_RESUMO_OP, chave_pagina, consultar_ops, criar_banco,
+    gerenciador,
+)
+from exportacao import consultas_exportacao
+
+# Filtros que exercitam cada caminho de consultar_ops: prefixo de Nº + FTS,
+# só FTS e o LIKE dos filtros curtos
+FILTROS = ("123", "abc", "12")
+# O que a FK ON DELETE CASCADE executa ao apagar uma OP
+SQL_CASCATA = "DELETE FROM taloes WHERE op_id = ?"
+
+# Varreduras completas aceitas: (consulta, detalhe exato do plano) -> motivo.
+# Se o índice citado sumir, o plano muda e a varredura volta a ser apontada
+_LIKE_CURTO = "LIKE '%…%' de filtro curto (< 3 caracteres, sem trigram): percorre só o índice de cliente"
+VARREDURAS_ACEITAS = {
+    ("busca '12' por relevância", "SCAN ops USING COVERING INDEX idx_ops_cliente"): _LIKE_CURTO,
+    ("busca '12' por data", "SCAN ops USING COVERING INDEX idx_ops_cliente"): _LIKE_CURTO,
+    ("busca '12' por data", "SCAN ops USING INDEX idx_ops_data"):
+        "filtro curto casa com muitas OPs: segue o índice da ordenação até encher a página",
+    ("exportação de todas as OPs", "SCAN o USING INDEX idx_ops_data"):
+        "exporta todas as OPs, em ordem de criação",
+}
+
+_VARREDURA = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+_SUBCONSULTA = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\w+)")
+# ORDER BY ... LIMIT no fim do SQL, fora de parênteses: paginação da consulta de cima
+_PAGINA = re.compile(r"ORDER BY [^()]*LIMIT [^()]*$")
+_PARENTESES = re.compile(r"\([^()]*\)")
+# O SELECT que consultar_ops executa (o FTS5 executa PRAGMAs e SELECTs próprios)
+_SELECT_LISTA = f"SELECT {COLUNAS_LISTA_OPS} FROM"
+
+
+class Plano(NamedTuple):
+    nome: str
+    sql: str
+    detalhes: List[str]
+    varreduras: List[str]  # passos do plano que percorrem tabela/índice inteiros
+
+
+def _consultas_lista(c: sqlite3.Cursor) -> Iterator[Tuple[str, str]]:
+    capturadas: List[str] = []
+
+    def capturar(sql: str) -> None:
+        # Ignora o SQL interno do FTS5/triggers (vem como comentário "-- ...")
+        if not sql.lstrip().startswith("--"):
+            capturadas.append(sql)
+
+    def consulta() -> str:
+        sql = next(sql for sql in capturadas if sql.lstrip().startswith(_SELECT_LISTA))
+        capturadas.clear()
+        return sql
+
+    conn = c.connection
+    conn.set_trace_callback(capturar)
+    try:
+        for ordem in ORDENS_OPS:
+            for decrescente in (True, False):
+                sentido = "desc" if decrescente else "asc"
+                capturadas.clear()
+                linhas = consultar_ops(c, "", 200, 0, ordem, decrescente)
+                yield f"lista por {ordem} {sentido}", consulta()
+                apos = chave_pagina(linhas[-1], ordem) if linhas else (0, 0)
+                consultar_ops(c, "", 200, 0, ordem, decrescente, apos)
+                yield f"lista por {ordem} {sentido} (página seguinte)", consulta()
+        for filtro in FILTROS:
+            capturadas.clear()
+            consultar_ops(c, filtro, 200)
+            yield f"busca '{filtro}' por relevância", consulta()
+            consultar_ops(c, filtro, 200, 0, "data_criacao", True)
+            yield f"busca '{filtro}' por data", consulta()
+    finally:
+        conn.set_trace_callback(None)
+
+
+def _consultas_fixas() -> Iterator[Tuple[str, str, Tuple]]:
+    yield "carga dos talões", SQL_CARREGAR_TALOES, (1,)
+    yield "exclusão em cascata", SQL_CASCATA, (1,)
+    yield "resumo da OP", SQL_RESUMO_OP, (1,)
+    for nome, (op_ids, inicio, fim) in (
+        ("exportação de OPs selecionadas", ([1, 2, 3], None, None)),
+        ("exportação por período", (None, "2025-01-01", "2025-12-31")),
+        ("exportação de todas as OPs", (None, None, None)),
+    ):
+        for sql, params in consultas_exportacao(op_ids, inicio, fim):
+            yield nome, sql, params
+
+
+def _plano(c: sqlite3.Cursor, nome: str, sql: str, params: Tuple = ()) -> Plano:
+    c.execute("EXPLAIN QUERY PLAN " + sql, params)
+    nos = [(pai, detalhe) for _id, pai, _, detalhe in c.fetchall()]
+    detalhes = [detalhe for _, detalhe in nos]
+    subconsultas = {m.group(1) for m in map(_SUBCONSULTA.match, detalhes) if m}
+    sql = " ".join(sql.split())
+    # Nível de cima do SQL, sem o que está entre parênteses (subconsultas, tuplas)
+    topo = sql
+    while _PARENTESES.search(topo):
+        topo = _PARENTESES.sub("", topo)
+    pagina_ordenada = (
+        bool(_PAGINA.search(topo)) and " WHERE " not in topo and not any("TEMP B-TREE" in d for d in detalhes)
+    )
+    varreduras = []
+    for pai, detalhe in nos:
+        m = _VARREDURA.match(detalhe)
+        if m is None or m.group(1) in subconsultas or (nome, detalhe) in VARREDURAS_ACEITAS:
+            continue
+        if pai == 0 and pagina_ordenada:
+            # Nível de cima percorrendo o índice na ordem do ORDER BY: para no LIMIT
+            continue
+        varreduras.append(detalhe)
+    if not detalhes:
+        varreduras.append("plano vazio")
+    return Plano(nome, sql, detalhes, varreduras)
+
+
+def verificar_planos() -> List[Plano]:
+    """Planos de todas as consultas quentes (``varreduras`` vazio = usa índice)."""
+    planos = []
+    with gerenciador().leitura() as c:
+        for nome, sql in list(_consultas_lista(c)):
+            planos.append(_plano(c, nome, sql))
+        for nome, sql, params in _consultas_fixas():
+            planos.append(_plano(c, nome, sql, params))
+    return planos
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verifica os planos das consultas quentes.")
+    parser.add_argument("--banco", default=banco.DATABASE_PATH)
+    parser.add_argument("-v", "--verboso", action="store_true", help="mostra o plano de cada consulta")
+    args = parser.parse_args(argv)
+
+    banco.DATABASE_PATH = args.banco
+    criar_banco()
+    problemas = 0
+    for plano in verificar_planos():
+        if plano.varreduras:
+            problemas += 1
+            print(f"VARREDURA {'; '.join(plano.varreduras)}: {plano.nome}", file=sys.stderr)
+        elif args.verboso:
+            print(f"ok: {plano.nome}")
+        if args.verboso or plano.varreduras:
+            for detalhe in plano.detalhes:
+                print(f"    {detalhe}")
+    print(f"{problemas} consulta(s) com varredura completa.")
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
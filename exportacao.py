@@ -0,0 +1,176 @@
+"""
+Exportação de OPs para CSV
+--------------------------
+Motor único usado pela lista de OPs e pela tela da OP. As linhas saem do cursor
+direto para o arquivo (sem carregar a OP inteira em memória) e um mesmo arquivo
+pode conter várias OPs: uma lista de IDs, um período ou todas.
+
+Layouts:
+- LAYOUT_LONGO: uma linha por célula (giro, talão, tamanho, quantidade);
+- LAYOUT_LARGO: uma linha por talão, uma coluna por tamanho + TOTAL TALÃO.
+
+Não importa Qt.
+"""
+
+import csv
+import os
+import tempfile
+from datetime import date, timedelta
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from banco import INDICE_TAMANHO, TAMANHOS, gerenciador
+
+LAYOUT_LONGO = "longo"
+LAYOUT_LARGO = "largo"
+LAYOUTS = (LAYOUT_LONGO, LAYOUT_LARGO)
+
+COLUNAS_OP = ["OP ID", "Cliente", "Nº OP", "Criada em", "Total Pares"]
+LOTE_IDS = 500  # IDs por consulta ao exportar uma lista de OPs
+LINHAS_POR_PROGRESSO = 2000  # frequência do callback de progresso
+
+# progresso(ops_concluidas, total_ops, linhas_escritas) -> False para cancelar
+Progresso = Callable[[int, int, int], bool]
+
+
+# mkstemp cria o arquivo como 0600; o CSV final recebe as permissões de um
+# arquivo comum (0666 menos a umask), lida uma vez aqui
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def aplicar_permissoes_padrao(caminho: str) -> None:
+    """Dá a ``caminho`` (temporário do mkstemp) as permissões de um arquivo criado com ``open``."""
+    os.chmod(caminho, 0o666 & ~_UMASK)
+
+
+class ExportacaoCancelada(Exception):
+    """A exportação foi cancelada pelo callback de progresso."""
+
+_SELECT = """
+    SELECT o.id, o.cliente, o.num_op, o.data_criacao, o.total_pares,
+           t.giro, t.talao_num, t.numeracao, t.quantidade
+    FROM ops o JOIN taloes t ON t.op_id = o.id
+"""
+
+
+def cabecalho(layout: str) -> List[str]:
+    if layout == LAYOUT_LARGO:
+        return COLUNAS_OP + ["Giro", "Talão"] + TAMANHOS + ["TOTAL TALÃO"]
+    return COLUNAS_OP + ["Giro", "Talão", "Tamanho", "Quantidade"]
+
+
+def _filtro_ops(data_inicio: Optional[str], data_fim: Optional[str]) -> Tuple[str, Tuple]:
+    """Condição WHERE (sobre ``o``) e parâmetros para período/todas as OPs."""
+    condicoes, params = [], []
+    if data_inicio:
+        condicoes.append("o.data_criacao >= ?")
+        params.append(data_inicio)
+    if data_fim:
+        # data_fim é inclusiva: vai até o início do dia seguinte
+        condicoes.append("o.data_criacao < ?")
+        params.append((date.fromisoformat(data_fim) + timedelta(days=1)).isoformat())
+    where = (" WHERE " + " AND ".join(condicoes)) if condicoes else ""
+    return where, tuple(params)
+
+
+def contar_ops(
+    c, op_ids: Optional[Sequence[int]] = None, data_inicio: Optional[str] = None, data_fim: Optional[str] = None
+) -> int:
+    """Quantas OPs a exportação vai percorrer (para a barra de progresso)."""
+    if op_ids is not None:
+        return len(set(op_ids))
+    where, params = _filtro_ops(data_inicio, data_fim)
+    c.execute("SELECT COUNT(*) FROM ops o" + where, params)
+    return c.fetchone()[0]
+
+
+def consultas_exportacao(
+    op_ids: Optional[Sequence[int]], data_inicio: Optional[str], data_fim: Optional[str]
+) -> Iterator[Tuple[str, Tuple]]:
+    """Consultas (SQL, parâmetros) cujas linhas, em sequência, formam a exportação."""
+    if op_ids is not None:
+        ids = sorted(set(op_ids))
+        for i in range(0, len(ids), LOTE_IDS):
+            lote = ids[i:i + LOTE_IDS]
+            marcadores = ", ".join("?" * len(lote))
+            yield (
+                _SELECT + f" WHERE o.id IN ({marcadores}) ORDER BY o.id, t.giro, t.talao_num, t.numeracao",
+                tuple(lote),
+            )
+        return
+
+    where, params = _filtro_ops(data_inicio, data_fim)
+    yield (_SELECT + where + " ORDER BY o.data_criacao, o.id, t.giro, t.talao_num, t.numeracao", params)
+
+
+def _linhas_largas(linhas: Iterable[Tuple]) -> Iterator[List]:
+    """Agrupa as linhas (ordenadas por talão) em uma linha por talão."""
+    n = len(TAMANHOS)
+    chave = None
+    base: List = []
+    qtds = [0] * n
+    for op_id, cliente, num_op, data_criacao, total_pares, giro, talao_num, numeracao, quantidade in linhas:
+        if (op_id, giro, talao_num) != chave:
+            if chave is not None:
+                yield base + qtds + [sum(qtds)]
+            chave = (op_id, giro, talao_num)
+            base = [op_id, cliente, num_op, data_criacao, total_pares, giro, talao_num]
+            qtds = [0] * n
+        j = INDICE_TAMANHO.get(numeracao)
+        if j is not None:
+            qtds[j] = quantidade
+    if chave is not None:
+        yield base + qtds + [sum(qtds)]
+
+
+def exportar_csv(
+    caminho: str,
+    op_ids: Optional[Sequence[int]] = None,
+    data_inicio: Optional[str] = None,
+    data_fim: Optional[str] = None,
+    layout: str = LAYOUT_LONGO,
+    progresso: Optional[Progresso] = None,
+) -> Tuple[int, int]:
+    """Exporta OPs para ``caminho`` e retorna (OPs exportadas, linhas escritas).
+
+    ``op_ids`` limita a exportação a essas OPs; sem ele, exporta todas as OPs
+    (ou as criadas entre ``data_inicio`` e ``data_fim``, datas ``AAAA-MM-DD``).
+
+    O arquivo é escrito num temporário na mesma pasta e só substitui ``caminho``
+    no fim; se ``progresso`` retornar False a exportação para com
+    ``ExportacaoCancelada`` e nenhum CSV parcial fica no disco.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Layout inválido: {layout}")
+    ops_exportadas = 0
+    linhas_escritas = 0
+    ultimo_op = None
+
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    fd, temporario = tempfile.mkstemp(prefix=".exportando-", suffix=".csv", dir=pasta)
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f, gerenciador().leitura() as c:
+            total_ops = contar_ops(c, op_ids, data_inicio, data_fim) if progresso else 0
+            w = csv.writer(f)
+            w.writerow(cabecalho(layout))
+            for sql, params in consultas_exportacao(op_ids, data_inicio, data_fim):
+                c.execute(sql, params)
+                linhas = _linhas_largas(c) if layout == LAYOUT_LARGO else c
+                for linha in linhas:
+                    if linha[0] != ultimo_op:
+                        ultimo_op = linha[0]
+                        ops_exportadas += 1
+                    w.writerow(linha)
+                    linhas_escritas += 1
+                    if progresso and linhas_escritas % LINHAS_POR_PROGRESSO == 0:
+                        if progresso(ops_exportadas, total_ops, linhas_escritas) is False:
+                            raise ExportacaoCancelada()
+            if progresso:
+                progresso(ops_exportadas, total_ops, linhas_escritas)
+        aplicar_permissoes_padrao(temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return ops_exportadas, linhas_escritas
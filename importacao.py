@@ -0,0 +1,168 @@
+"""
+Importação em lote de OPs (CSV ou JSONL)
+----------------------------------------
+Lê arquivos de pedidos do ERP com as colunas/chaves ``cliente``, ``num_op``,
+``total_pares`` e ``tipo`` e cria as OPs com seus talões em lotes grandes,
+cada lote numa transação.
+
+Antes de gravar, ``analisar_arquivo`` percorre o arquivo (em streaming) e
+aponta linhas inválidas e Nº de OP repetidos no arquivo ou já existentes no
+banco; esses pedidos são ignorados na importação.
+
+Uso sem interface:  python importacao.py pedidos.csv [--lote 1000] [--somente-validar]
+"""
+
+import argparse
+import csv
+import json
+import sys
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from banco import NUM_OP_MAX, TIPOS, Pedido, criar_banco, criar_ops_em_lote, num_ops_existentes, so_digitos
+
+LOTE_PADRAO = 1000
+CAMPOS = ("cliente", "num_op", "total_pares", "tipo")
+
+# progresso(pedidos_gravados, total_pedidos) -> False para parar após o lote atual
+ProgressoImportacao = Callable[[int, int], bool]
+
+
+class ErroPedido(NamedTuple):
+    linha: int
+    mensagem: str
+
+
+class Analise(NamedTuple):
+    validos: int
+    erros: List[ErroPedido]
+    duplicados: Dict[int, List[int]]  # num_op -> linhas (repetido no arquivo ou já no banco)
+
+
+class ResultadoImportacao(NamedTuple):
+    importadas: int
+    ignoradas: int
+    interrompida: bool
+
+
+def _ler_registros(caminho: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """(nº da linha, registro) de um .jsonl ou CSV (separador , ; ou tab)."""
+    if caminho.lower().endswith((".jsonl", ".ndjson")):
+        with open(caminho, encoding="utf-8-sig") as f:
+            for num, texto in enumerate(f, start=1):
+                if texto.strip():
+                    try:
+                        registro = json.loads(texto)
+                    except json.JSONDecodeError as e:
+                        registro = {"_erro": f"JSON inválido: {e.msg}"}
+                    yield num, registro if isinstance(registro, dict) else {"_erro": "linha não é um objeto"}
+        return
+
+    with open(caminho, newline="", encoding="utf-8-sig") as f:
+        amostra = f.read(4096)
+        f.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+        except csv.Error:
+            dialeto = csv.excel
+        leitor = csv.DictReader(f, dialect=dialeto)
+        leitor.fieldnames = [(nome or "").strip().lower() for nome in leitor.fieldnames or []]
+        for registro in leitor:
+            yield leitor.line_num, registro
+
+
+def _converter(registro: Dict) -> Tuple[Optional[Pedido], Optional[str]]:
+    if "_erro" in registro:
+        return None, registro["_erro"]
+    faltando = [campo for campo in CAMPOS if str(registro.get(campo) or "").strip() == ""]
+    if faltando:
+        return None, "campo(s) vazio(s): " + ", ".join(faltando)
+    cliente = str(registro["cliente"]).strip()
+    num_op_txt = str(registro["num_op"]).strip()
+    total_txt = str(registro["total_pares"]).strip()
+    # Inteiros positivos que cabem no INTEGER de 64 bits do SQLite
+    if not so_digitos(num_op_txt) or not 0 < int(num_op_txt) <= NUM_OP_MAX:
+        return None, f"num_op inválido: {num_op_txt}"
+    if not so_digitos(total_txt) or not 0 < int(total_txt) <= NUM_OP_MAX:
+        return None, f"total_pares inválido: {total_txt}"
+    tipos = {t.lower(): t for t in TIPOS}
+    tipo = tipos.get(str(registro["tipo"]).strip().lower())
+    if tipo is None:
+        return None, f"tipo inválido: {registro['tipo']} (use {', '.join(TIPOS)})"
+    return (cliente, int(num_op_txt), int(total_txt), tipo), None
+
+
+def analisar_arquivo(caminho: str) -> Analise:
+    """Valida o arquivo inteiro sem gravar nada."""
+    erros: List[ErroPedido] = []
+    linhas_por_num: Dict[int, List[int]] = {}
+    for num, registro in _ler_registros(caminho):
+        pedido, erro = _converter(registro)
+        if erro:
+            erros.append(ErroPedido(num, erro))
+        else:
+            linhas_por_num.setdefault(pedido[1], []).append(num)
+
+    existentes = num_ops_existentes(linhas_por_num)
+    duplicados = {n: linhas for n, linhas in linhas_por_num.items() if len(linhas) > 1 or n in existentes}
+    validos = sum(1 for n in linhas_por_num if n not in duplicados)
+    return Analise(validos, erros, duplicados)
+
+
+def importar_arquivo(
+    caminho: str,
+    analise: Optional[Analise] = None,
+    lote: int = LOTE_PADRAO,
+    progresso: Optional[ProgressoImportacao] = None,
+) -> ResultadoImportacao:
+    """Importa os pedidos válidos e não duplicados, ``lote`` OPs por transação."""
+    analise = analise or analisar_arquivo(caminho)
+    ignorar = set(analise.duplicados)
+    importadas = 0
+    ignoradas = 0
+    pendentes: List[Pedido] = []
+
+    def gravar() -> bool:
+        nonlocal importadas
+        criar_ops_em_lote(pendentes)
+        importadas += len(pendentes)
+        pendentes.clear()
+        return progresso is None or progresso(importadas, analise.validos) is not False
+
+    for _num, registro in _ler_registros(caminho):
+        pedido, erro = _converter(registro)
+        if erro or pedido[1] in ignorar:
+            ignoradas += 1
+            continue
+        pendentes.append(pedido)
+        if len(pendentes) >= lote and not gravar():
+            return ResultadoImportacao(importadas, ignoradas, True)
+    if pendentes:
+        gravar()
+    return ResultadoImportacao(importadas, ignoradas, False)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Importa OPs em lote de um arquivo CSV ou JSONL.")
+    parser.add_argument("arquivo")
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO, help="OPs por transação")
+    parser.add_argument("--somente-validar", action="store_true", help="só analisa, não grava")
+    args = parser.parse_args(argv)
+
+    criar_banco()
+    analise = analisar_arquivo(args.arquivo)
+    for erro in analise.erros:
+        print(f"linha {erro.linha}: {erro.mensagem}", file=sys.stderr)
+    for num_op, linhas in sorted(analise.duplicados.items()):
+        print(f"Nº OP {num_op} duplicado (linhas {', '.join(map(str, linhas))})", file=sys.stderr)
+    print(f"{analise.validos} pedido(s) válido(s), {len(analise.erros)} inválido(s), "
+          f"{len(analise.duplicados)} Nº de OP duplicado(s)")
+    if args.somente_validar:
+        return 0 if not analise.erros and not analise.duplicados else 1
+
+    resultado = importar_arquivo(args.arquivo, analise, args.lote)
+    print(f"{resultado.importadas} OP(s) importada(s), {resultado.ignoradas} linha(s) ignorada(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Linha de Comando do App de OPs (sem interface)
+----------------------------------------------
+Operações em lote para rodar em servidor/cron, sem Qt e sem tela:
+
+    python -m ops create --cliente "Loja X" --num-op 1234 --total-pares 600 --tipo Feminino
+    python -m ops import pedidos.csv [--lote 1000] [--somente-validar]
+    python -m ops export saida.csv [--ops 1,2,3 | --de 2025-01-01 --ate 2025-01-31] [--layout largo]
+    python -m ops validate [OP_ID ...]        (sem IDs: todas as OPs)
+    python -m ops stats [--json]
+    python -m ops serve [--host 127.0.0.1] [--porta 8765] [--token SEGREDO]   (ver servidor.py)
+
+``--banco`` (antes do subcomando) escolhe o arquivo do banco. Cada subcomando
+importa só o que usa; nada aqui importa PyQt5.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import date
+from typing import List, Optional
+
+import banco
+from banco import (
+    NUM_OP_MAX, TIPOS, carregar_op, carregar_taloes, criar_banco, criar_op, fechar_conexoes, gerenciador,
+)
+
+
+# ===========
+# Subcomandos
+# ===========
+
+def _create(args) -> int:
+    # Mesmas regras da tela, da importação e do servidor
+    cliente = args.cliente.strip()
+    if not cliente:
+        print("Cliente é obrigatório.", file=sys.stderr)
+        return 2
+    for campo, valor in (("Nº OP", args.num_op), ("Total de pares", args.total_pares)):
+        if not 0 < valor <= NUM_OP_MAX:
+            print(f"{campo} deve estar entre 1 e {NUM_OP_MAX}.", file=sys.stderr)
+            return 2
+    try:
+        op_id = criar_op(cliente, args.num_op, args.total_pares, args.tipo)
+    except sqlite3.IntegrityError:
+        print(f"Nº OP {args.num_op} já existe.", file=sys.stderr)
+        return 1
+    print(op_id)
+    return 0
+
+
+def _import(args) -> int:
+    from importacao import main as importar
+
+    argv = [args.arquivo, "--lote", str(args.lote)]
+    if args.somente_validar:
+        argv.append("--somente-validar")
+    return importar(argv)
+
+
+def _export(args) -> int:
+    from exportacao import exportar_csv
+
+    n_ops, linhas = exportar_csv(args.destino, args.ops, args.de, args.ate, args.layout)
+    print(f"{n_ops} OP(s) exportada(s), {linhas} linha(s) em {args.destino}")
+    return 0
+
+
+def _validate(args) -> int:
+    from validacao import validar_op
+
+    op_ids = args.op_ids
+    if not op_ids:
+        with gerenciador().leitura() as c:
+            op_ids = [linha[0] for linha in c.execute("SELECT id FROM ops ORDER BY id")]
+    com_problema = 0
+    for op_id in op_ids:
+        cabecalho = carregar_op(op_id)
+        if cabecalho is None:
+            print(f"OP {op_id}: não existe", file=sys.stderr)
+            com_problema += 1
+            continue
+        _cliente, num_op, _data, total_pares, tipo = cabecalho
+        violacoes = validar_op(carregar_taloes(op_id), total_pares, tipo)
+        if any(v.bloqueia for v in violacoes):
+            com_problema += 1
+        for v in violacoes:
+            print(f"OP {op_id} (Nº {num_op}): {'' if v.bloqueia else 'aviso: '}{v.mensagem}")
+    print(f"{len(op_ids)} OP(s) verificada(s), {com_problema} com problema(s) que impedem salvar.")
+    return 1 if com_problema else 0
+
+
+def _serve(args) -> int:
+    from servidor import main as servir
+
+    argv = ["--banco", args.banco, "--host", args.host, "--porta", str(args.porta)]
+    if args.token:
+        argv += ["--token", args.token]
+    return servir(argv)
+
+
+def _stats(args) -> int:
+    painel = banco.painel_producao()
+    with gerenciador().consulta() as c:
+        n_ops = c.execute("SELECT count(*) FROM ops").fetchone()[0]
+    if args.json:
+        dados = {"ops": n_ops, "pares": painel.pares, "pares_ok": painel.pares_ok}
+        for campo in ("por_cliente", "por_tipo", "por_tamanho", "por_dia", "por_semana"):
+            dados[campo] = [
+                {"chave": chave, "pares": pares, "pares_ok": ok} for chave, pares, ok in getattr(painel, campo)
+            ]
+        json.dump(dados, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+
+    print(f"OPs: {n_ops} · Pares: {painel.pares} · OK: {painel.pares_ok} · "
+          f"Pendentes: {painel.pares - painel.pares_ok}")
+    for titulo, linhas in (
+        ("Por tipo", painel.por_tipo),
+        ("Por tamanho", painel.por_tamanho),
+        ("Por semana", painel.por_semana[:8]),
+        ("Maiores clientes", painel.por_cliente[:10]),
+    ):
+        print(f"\n{titulo}:")
+        for chave, pares, ok in linhas:
+            print(f"  {chave:<24} {pares:>10} pares  {ok:>10} OK  {pares - ok:>10} pendentes")
+    return 0
+
+
+# ======
+# Parser
+# ======
+
+def _data(texto: str) -> str:
+    """Tipo argparse para AAAA-MM-DD: data inválida vira erro de uso, não um filtro vazio."""
+    try:
+        return date.fromisoformat(texto).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida (use AAAA-MM-DD): {texto}")
+
+
+def _ids(texto: str) -> List[int]:
+    try:
+        return [int(v) for v in texto.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"IDs inválidos: {texto}")
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m ops", description="Operações em lote sobre as OPs.")
+    parser.add_argument("--banco", default=banco.DATABASE_PATH, help="arquivo do banco SQLite")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("create", help="cria uma OP com seus talões")
+    p.add_argument("--cliente", required=True)
+    p.add_argument("--num-op", type=int, required=True)
+    p.add_argument("--total-pares", type=int, required=True)
+    p.add_argument("--tipo", choices=TIPOS, required=True)
+    p.set_defaults(funcao=_create)
+
+    p = sub.add_parser("import", help="importa pedidos de um CSV/JSONL")
+    p.add_argument("arquivo")
+    p.add_argument("--lote", type=int, default=1000, help="OPs por transação")
+    p.add_argument("--somente-validar", action="store_true", help="só analisa, não grava")
+    p.set_defaults(funcao=_import)
+
+    p = sub.add_parser("export", help="exporta OPs para CSV")
+    p.add_argument("destino")
+    p.add_argument("--ops", type=_ids, help="IDs separados por vírgula (padrão: todas)")
+    p.add_argument("--de", type=_data, help="criadas a partir de AAAA-MM-DD")
+    p.add_argument("--ate", type=_data, help="criadas até AAAA-MM-DD (inclusive)")
+    p.add_argument("--layout", choices=("longo", "largo"), default="longo")
+    p.set_defaults(funcao=_export)
+
+    p = sub.add_parser("validate", help="valida OPs (código 1 se alguma não puder ser salva)")
+    p.add_argument("op_ids", nargs="*", type=int)
+    p.set_defaults(funcao=_validate)
+
+    p = sub.add_parser("stats", help="totais de produção (painel)")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(funcao=_stats)
+
+    p = sub.add_parser("serve", help="serve o banco às estações da rede (HTTP/JSON)")
+    p.add_argument("--host", default="127.0.0.1", help="0.0.0.0 = toda a rede (exige --token)")
+    p.add_argument("--porta", type=int, default=8765)
+    p.add_argument("--token", help="segredo das estações (padrão: $OPS_TOKEN)")
+    p.set_defaults(funcao=_serve)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parser().parse_args(argv)
+    banco.DATABASE_PATH = args.banco
+    criar_banco()
+    try:
+        return args.funcao(args)
+    finally:
+        fechar_conexoes()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
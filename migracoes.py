@@ -0,0 +1,656 @@
+"""
+Migrações de Esquema do Banco de OPs
+------------------------------------
+Cada migração leva o banco de uma versão à seguinte; a versão aplicada fica
+gravada em ``PRAGMA user_version`` (cabeçalho do arquivo). Na abertura do app
+basta uma leitura dessa versão para saber se há algo a fazer; as migrações
+pendentes rodam em ordem, cada uma numa transação própria junto com a
+atualização da versão.
+
+As migrações são escritas para funcionar tanto num banco vazio quanto nos
+bancos antigos (sem ``total_pares``/``tipo``/``taloes.status``) e nos criados
+pelas versões anteriores do app, que não gravavam ``user_version``.
+
+Alterações que o ``ALTER TABLE`` do SQLite não suporta (mudar restrições,
+chaves estrangeiras...) usam ``reconstruir_tabela``, que copia os dados em
+lotes para a tabela nova.
+
+Este módulo não importa Qt nem ``banco``: recebe a conexão pronta.
+
+Uso sem interface:  python migracoes.py [producao_calcados.db]
+"""
+
+import argparse
+import sqlite3
+import sys
+from typing import Callable, List, Optional, Tuple
+
+LOTE_COPIA = 50000  # linhas por INSERT ... SELECT em reconstruir_tabela
+
+# progresso(linhas_copiadas, total_linhas) durante reconstruções de tabela
+ProgressoCopia = Callable[[int, int], None]
+
+
+class VersaoEsquemaIncompativel(RuntimeError):
+    """O banco foi gravado por uma versão mais nova do app."""
+
+
+# ==========
+# Utilidades
+# ==========
+
+def colunas(c: sqlite3.Cursor, tabela: str) -> List[str]:
+    return [linha[1] for linha in c.execute(f"PRAGMA table_info({tabela})")]
+
+
+def existe(c: sqlite3.Cursor, tipo: str, nome: str) -> bool:
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?", (tipo, nome))
+    return c.fetchone() is not None
+
+
+def adicionar_coluna(c: sqlite3.Cursor, tabela: str, coluna: str, definicao: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN só se a coluna ainda não existir."""
+    if coluna in colunas(c, tabela):
+        return False
+    c.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+    return True
+
+
+def _colunas_chave(c: sqlite3.Cursor, tabela: str) -> List[str]:
+    try:
+        c.execute(f"SELECT rowid FROM {tabela} LIMIT 0")
+        return ["rowid"]
+    except sqlite3.OperationalError:
+        # WITHOUT ROWID: colunas da chave primária, na ordem da chave
+        info = sorted((linha[5], linha[1]) for linha in c.execute(f"PRAGMA table_info({tabela})") if linha[5])
+        return [nome for _pk, nome in info]
+
+
+def reconstruir_tabela(
+    c: sqlite3.Cursor,
+    tabela: str,
+    definicao: str,
+    lote: int = LOTE_COPIA,
+    progresso: Optional[ProgressoCopia] = None,
+) -> int:
+    """Recria ``tabela`` com a nova ``definicao`` (corpo do CREATE TABLE).
+
+    Segue o procedimento recomendado pelo SQLite: cria a tabela nova, copia
+    as colunas em comum em lotes pela chave, troca as tabelas e recria os
+    índices e triggers da original. Deve rodar dentro da transação da
+    migração e com ``foreign_keys`` desligado (``migrar`` cuida disso).
+    Retorna o número de linhas copiadas.
+    """
+    nova = f"{tabela}__nova"
+    c.execute(f"DROP TABLE IF EXISTS {nova}")
+    c.execute(f"CREATE TABLE {nova} {definicao}")
+    antigas = set(colunas(c, tabela))
+    em_comum = ", ".join(col for col in colunas(c, nova) if col in antigas)
+
+    # Índices/triggers da tabela antiga somem no DROP: guarda para recriar
+    c.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+        "AND sql IS NOT NULL",
+        (tabela,),
+    )
+    dependentes = [linha[0] for linha in c.fetchall()]
+    sequencia = None
+    if existe(c, "table", "sqlite_sequence"):
+        c.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (tabela,))
+        linha = c.fetchone()
+        sequencia = linha[0] if linha else None
+
+    # Lotes em ordem de chave: rowid, ou a chave primária numa WITHOUT ROWID
+    chave = ", ".join(_colunas_chave(c, tabela))
+    c.execute(f"SELECT count(*) FROM {tabela}")
+    total = c.fetchone()[0]
+    copiadas = 0
+    ultimo: Optional[Tuple] = None
+    while copiadas < total:
+        depois = f"({chave}) > ({', '.join('?' * len(ultimo))})" if ultimo else "1"
+        c.execute(
+            f"SELECT {chave} FROM {tabela} WHERE {depois} ORDER BY {chave} LIMIT 1 OFFSET ?",
+            (*(ultimo or ()), lote - 1),
+        )
+        limite = c.fetchone()
+        ate = f" AND ({chave}) <= ({', '.join('?' * len(limite))})" if limite else ""
+        c.execute(
+            f"INSERT INTO {nova} ({em_comum}) SELECT {em_comum} FROM {tabela} WHERE {depois}{ate}",
+            (*(ultimo or ()), *(limite or ())),
+        )
+        copiadas += c.rowcount
+        if progresso is not None:
+            progresso(copiadas, total)
+        if limite is None:
+            break
+        ultimo = tuple(limite)
+
+    c.execute(f"DROP TABLE {tabela}")
+    c.execute(f"ALTER TABLE {nova} RENAME TO {tabela}")
+    for sql in dependentes:
+        c.execute(sql)
+    if sequencia is not None and "AUTOINCREMENT" in definicao.upper():
+        # Preserva o AUTOINCREMENT: ids de linhas já apagadas não são reutilizados
+        c.execute("DELETE FROM sqlite_sequence WHERE name = ?", (tabela,))
+        c.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (tabela, sequencia))
+    return copiadas
+
+
+# ==========
+# Migrações
+# ==========
+
+def _v1_esquema_base(c: sqlite3.Cursor) -> None:
+    """Tabelas ops/taloes; completa colunas que faltam nos bancos antigos."""
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ops (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente TEXT NOT NULL,
+            num_op INTEGER UNIQUE NOT NULL,
+            data_criacao TEXT NOT NULL,
+            total_pares INTEGER NOT NULL DEFAULT 0,
+            tipo TEXT NOT NULL DEFAULT 'Masculino'
+        )
+        """
+    )
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS taloes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            op_id INTEGER NOT NULL,
+            giro INTEGER NOT NULL,
+            talao_num INTEGER NOT NULL,
+            numeracao TEXT NOT NULL,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            FOREIGN KEY (op_id) REFERENCES ops (id)
+        )
+        """
+    )
+    # Bancos antigos podem ter a mesma célula repetida; a carga antiga ficava
+    # com a última linha lida, então mantém a de maior id
+    c.execute(
+        """
+        DELETE FROM taloes WHERE id NOT IN (
+            SELECT max(id) FROM taloes GROUP BY op_id, giro, talao_num, numeracao
+        )
+        """
+    )
+    if adicionar_coluna(c, "ops", "total_pares", "INTEGER NOT NULL DEFAULT 0"):
+        # OPs antigas: o total é a soma do que está nos talões
+        c.execute(
+            "UPDATE ops SET total_pares = "
+            "(SELECT coalesce(sum(quantidade), 0) FROM taloes WHERE taloes.op_id = ops.id)"
+        )
+    # Mesmo padrão do antigo ajuste_db.py
+    adicionar_coluna(c, "ops", "tipo", "TEXT NOT NULL DEFAULT 'Masculino'")
+    adicionar_coluna(c, "taloes", "status", "TEXT NOT NULL DEFAULT 'pendente'")
+
+
+def _v2_indices(c: sqlite3.Cursor) -> None:
+    """Índices da lista de OPs e da célula (talão × tamanho)."""
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ops_numop ON ops(num_op)")
+    # Paginação keyset da lista: (coluna de ordenação, id)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ops_data ON ops(data_criacao, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ops_cliente ON ops(cliente, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ops_total ON ops(total_pares, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_taloes_op_giro ON taloes(op_id, giro)")
+    # Uma linha por célula (talão × tamanho): base do UPSERT em salvar_taloes
+    c.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_taloes_celula ON taloes(op_id, giro, talao_num, numeracao)"
+    )
+
+
+def _v3_busca(c: sqlite3.Cursor) -> None:
+    """Índice FTS5 (trigram) sobre ops.cliente, mantido por triggers."""
+    existia = existe(c, "table", "ops_busca")
+    c.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS ops_busca USING fts5(
+            cliente, content='ops', content_rowid='id', tokenize='trigram'
+        )
+        """
+    )
+    c.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS ops_busca_ai AFTER INSERT ON ops BEGIN
+            INSERT INTO ops_busca (rowid, cliente) VALUES (new.id, new.cliente);
+        END
+        """
+    )
+    c.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS ops_busca_ad AFTER DELETE ON ops BEGIN
+            INSERT INTO ops_busca (ops_busca, rowid, cliente) VALUES ('delete', old.id, old.cliente);
+        END
+        """
+    )
+    c.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS ops_busca_au AFTER UPDATE OF cliente ON ops BEGIN
+            INSERT INTO ops_busca (ops_busca, rowid, cliente) VALUES ('delete', old.id, old.cliente);
+            INSERT INTO ops_busca (rowid, cliente) VALUES (new.id, new.cliente);
+        END
+        """
+    )
+    if not existia:
+        # Banco já tinha OPs: indexa o que existe
+        c.execute("INSERT INTO ops_busca (ops_busca) VALUES ('rebuild')")
+
+
+def _v4_taloes_por_celula(c: sqlite3.Cursor) -> None:
+    """taloes passa a ser chaveada pela célula, com FK em cascata.
+
+    A chave primária (op_id, giro, talao_num, numeracao) numa tabela WITHOUT
+    ROWID é o próprio índice único da célula e já carrega quantidade/status:
+    carga, UPSERT e exportação leem só a árvore da tabela, e a exclusão em
+    cascata acha os talões da OP pelo prefixo op_id.
+    """
+    # Talões órfãos (de OPs já apagadas) impediriam a FK
+    c.execute("DELETE FROM taloes WHERE op_id NOT IN (SELECT id FROM ops)")
+    # Cobertos pela chave primária nova
+    c.execute("DROP INDEX IF EXISTS idx_taloes_op_giro")
+    c.execute("DROP INDEX IF EXISTS idx_taloes_celula")
+    reconstruir_tabela(
+        c,
+        "taloes",
+        """(
+            op_id INTEGER NOT NULL REFERENCES ops (id) ON DELETE CASCADE,
+            giro INTEGER NOT NULL,
+            talao_num INTEGER NOT NULL,
+            numeracao TEXT NOT NULL,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            PRIMARY KEY (op_id, giro, talao_num, numeracao)
+        ) WITHOUT ROWID""",
+    )
+    # Duplicava o índice da restrição UNIQUE de num_op
+    c.execute("DROP INDEX IF EXISTS idx_ops_numop")
+
+
+def _v5_status_por_talao(c: sqlite3.Cursor) -> None:
+    """Status por talão (não por célula), com histórico das transições.
+
+    Talão sem linha em status_taloes está pendente. Cada mudança de status é
+    um único UPSERT; os triggers registram a transição em historico_status.
+    """
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS status_taloes (
+            op_id INTEGER NOT NULL REFERENCES ops (id) ON DELETE CASCADE,
+            giro INTEGER NOT NULL,
+            talao_num INTEGER NOT NULL,
+            status TEXT NOT NULL CHECK (status IN ('pendente', 'ok')),
+            alterado_em TEXT NOT NULL,
+            PRIMARY KEY (op_id, giro, talao_num)
+        ) WITHOUT ROWID
+        """
+    )
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS historico_status (
+            id INTEGER PRIMARY KEY,
+            op_id INTEGER NOT NULL REFERENCES ops (id) ON DELETE CASCADE,
+            giro INTEGER NOT NULL,
+            talao_num INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            momento TEXT NOT NULL
+        )
+        """
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_historico_talao ON historico_status(op_id, giro, talao_num)"
+    )
+    c.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS status_taloes_ai AFTER INSERT ON status_taloes BEGIN
+            INSERT INTO historico_status (op_id, giro, talao_num, status, momento)
+            VALUES (new.op_id, new.giro, new.talao_num, new.status, new.alterado_em);
+        END
+        """
+    )
+    c.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS status_taloes_au AFTER UPDATE OF status ON status_taloes
+        WHEN old.status IS NOT new.status BEGIN
+            INSERT INTO historico_status (op_id, giro, talao_num, status, momento)
+            VALUES (new.op_id, new.giro, new.talao_num, new.status, new.alterado_em);
+        END
+        """
+    )
+    # O status antigo ficava em cada célula: o talão está OK se todas estavam
+    c.execute(
+        """
+        INSERT OR IGNORE INTO status_taloes (op_id, giro, talao_num, status, alterado_em)
+        SELECT op_id, giro, talao_num, 'ok', datetime('now', 'localtime')
+        FROM taloes GROUP BY op_id, giro, talao_num HAVING min(status = 'ok') = 1
+        """
+    )
+    reconstruir_tabela(
+        c,
+        "taloes",
+        """(
+            op_id INTEGER NOT NULL REFERENCES ops (id) ON DELETE CASCADE,
+            giro INTEGER NOT NULL,
+            talao_num INTEGER NOT NULL,
+            numeracao TEXT NOT NULL,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (op_id, giro, talao_num, numeracao)
+        ) WITHOUT ROWID""",
+    )
+
+
+def _v6_agregados(c: sqlite3.Cursor) -> None:
+    """Pares por OP × giro × tamanho × status e por OP, mantidos por triggers.
+
+    ``agregados`` acompanha cada escrita em taloes (inserção, quantidade,
+    exclusão) e em status_taloes (o talão muda de status levando seus pares);
+    ``resumo_ops`` acompanha ``agregados``. Assim totais e progresso saem por
+    chave primária, sem GROUP BY sobre taloes. Exclusões em cascata só fazem
+    UPDATE (a linha pode já ter saído junto com a OP).
+    """
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS agregados (
+            op_id INTEGER NOT NULL REFERENCES ops (id) ON DELETE CASCADE,
+            giro INTEGER NOT NULL,
+            numeracao TEXT NOT NULL,
+            status TEXT NOT NULL,
+            pares INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (op_id, giro, numeracao, status)
+        ) WITHOUT ROWID
+        """
+    )
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS resumo_ops (
+            op_id INTEGER PRIMARY KEY REFERENCES ops (id) ON DELETE CASCADE,
+            pares INTEGER NOT NULL DEFAULT 0,
+            pares_ok INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    status_do_talao = (
+        "coalesce((SELECT s.status FROM status_taloes s WHERE s.op_id = {t}.op_id "
+        "AND s.giro = {t}.giro AND s.talao_num = {t}.talao_num), 'pendente')"
+    )
+    c.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agregados_taloes_ai AFTER INSERT ON taloes BEGIN
+            INSERT INTO agregados (op_id, giro, numeracao, status, pares)
+            VALUES (new.op_id, new.giro, new.numeracao, {status_do_talao.format(t="new")}, new.quantidade)
+            ON CONFLICT (op_id, giro, numeracao, status) DO UPDATE SET pares = pares + excluded.pares;
+        END
+        """
+    )
+    c.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agregados_taloes_au AFTER UPDATE OF quantidade ON taloes
+        WHEN old.quantidade <> new.quantidade BEGIN
+            UPDATE agregados SET pares = pares + new.quantidade - old.quantidade
+            WHERE op_id = new.op_id AND giro = new.giro AND numeracao = new.numeracao
+              AND status = {status_do_talao.format(t="new")};
+        END
+        """
+    )
+    c.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agregados_taloes_ad AFTER DELETE ON taloes BEGIN
+            UPDATE agregados SET pares = pares - old.quantidade
+            WHERE op_id = old.op_id AND giro = old.giro AND numeracao = old.numeracao
+              AND status = {status_do_talao.format(t="old")};
+        END
+        """
+    )
+    # Mudança de status: os pares de cada tamanho do talão trocam de linha
+    mover = """
+        UPDATE agregados SET pares = pares - (
+            SELECT t.quantidade FROM taloes t
+            WHERE t.op_id = new.op_id AND t.giro = new.giro AND t.talao_num = new.talao_num
+              AND t.numeracao = agregados.numeracao
+        )
+        WHERE op_id = new.op_id AND giro = new.giro AND status = {anterior}
+          AND numeracao IN (
+            SELECT numeracao FROM taloes
+            WHERE op_id = new.op_id AND giro = new.giro AND talao_num = new.talao_num
+          );
+        INSERT INTO agregados (op_id, giro, numeracao, status, pares)
+        SELECT op_id, giro, numeracao, new.status, quantidade FROM taloes
+        WHERE op_id = new.op_id AND giro = new.giro AND talao_num = new.talao_num
+        ON CONFLICT (op_id, giro, numeracao, status) DO UPDATE SET pares = pares + excluded.pares;
+    """
+    c.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agregados_status_ai AFTER INSERT ON status_taloes
+        WHEN new.status <> 'pendente' BEGIN
+            {mover.format(anterior="'pendente'")}
+        END
+        """
+    )
+    c.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS agregados_status_au AFTER UPDATE OF status ON status_taloes
+        WHEN old.status <> new.status BEGIN
+            {mover.format(anterior="old.status")}
+        END
+        """
+    )
+    # resumo_ops segue agregados
+    c.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS resumo_ops_ai AFTER INSERT ON agregados BEGIN
+            INSERT INTO resumo_ops (op_id, pares, pares_ok)
+            VALUES (new.op_id, new.pares, CASE WHEN new.status = 'ok' THEN new.pares ELSE 0 END)
+            ON CONFLICT (op_id) DO UPDATE
+            SET pares = pares + excluded.pares, pares_ok = pares_ok + excluded.pares_ok;
+        END
+        """
+    )
+    c.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS resumo_ops_au AFTER UPDATE OF pares ON agregados BEGIN
+            UPDATE resumo_ops
+            SET pares = pares + new.pares - old.pares,
+                pares_ok = pares_ok + CASE WHEN new.status = 'ok' THEN new.pares - old.pares ELSE 0 END
+            WHERE op_id = new.op_id;
+        END
+        """
+    )
+
+    # Carga inicial a partir do que já existe
+    c.execute("DELETE FROM agregados")
+    c.execute("DELETE FROM resumo_ops")
+    c.execute(
+        """
+        INSERT INTO agregados (op_id, giro, numeracao, status, pares)
+        SELECT t.op_id, t.giro, t.numeracao, coalesce(s.status, 'pendente'), sum(t.quantidade)
+        FROM taloes t LEFT JOIN status_taloes s
+          ON s.op_id = t.op_id AND s.giro = t.giro AND s.talao_num = t.talao_num
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+
+
+def _v7_rollups(c: sqlite3.Cursor) -> None:
+    """Totais gerais do painel por cliente, tipo, tamanho e dia de criação.
+
+    ``rollups`` tem uma linha por (dimensão, chave) e é mantida a partir de
+    ``agregados``: cada variação de pares numa linha de agregados soma nas
+    quatro dimensões. Ao apagar uma OP, um trigger BEFORE DELETE retira antes
+    as linhas de agregados dela (descontando dos rollups) — a cascata não
+    dispara os triggers de agregados na ordem certa.
+    """
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rollups (
+            dimensao TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            pares INTEGER NOT NULL DEFAULT 0,
+            pares_ok INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimensao, chave)
+        ) WITHOUT ROWID
+        """
+    )
+    def somar(fonte: str, cliente: str, tipo: str, data: str, pares: str, ok: str, tamanho: str = "") -> str:
+        ramos = [
+            f"SELECT 'cliente', {cliente}, {pares}, {ok} {fonte}",
+            f"SELECT 'tipo', {tipo}, {pares}, {ok} {fonte}",
+            f"SELECT 'dia', substr({data}, 1, 10), {pares}, {ok} {fonte}",
+        ]
+        if tamanho:
+            ramos.append(f"SELECT 'tamanho', {tamanho}, {pares}, {ok} WHERE 1")
+        return (
+            "INSERT INTO rollups (dimensao, chave, pares, pares_ok) "
+            + " UNION ALL ".join(ramos)
+            + " ON CONFLICT (dimensao, chave) DO UPDATE"
+            " SET pares = pares + excluded.pares, pares_ok = pares_ok + excluded.pares_ok;"
+        )
+
+    def por_agregado(linha: str, sinal: str, pares: str) -> str:
+        return somar(
+            f"FROM ops o WHERE o.id = {linha}.op_id", "o.cliente", "o.tipo", "o.data_criacao",
+            f"{sinal}({pares})", f"{sinal}(CASE WHEN {linha}.status = 'ok' THEN {pares} ELSE 0 END)",
+            f"{linha}.numeracao",
+        )
+
+    c.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS rollups_agregados_ai AFTER INSERT ON agregados BEGIN
+            {por_agregado("new", "", "new.pares")}
+        END
+        """
+    )
+    c.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS rollups_agregados_au AFTER UPDATE OF pares ON agregados
+        WHEN old.pares <> new.pares BEGIN
+            {por_agregado("new", "", "new.pares - old.pares")}
+        END
+        """
+    )
+    c.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS rollups_agregados_ad AFTER DELETE ON agregados BEGIN
+            {por_agregado("old", "-", "old.pares")}
+        END
+        """
+    )
+    c.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS rollups_ops_bd BEFORE DELETE ON ops BEGIN
+            DELETE FROM agregados WHERE op_id = old.id;
+        END
+        """
+    )
+    # Cliente/tipo/data da OP alterados: os pares da OP mudam de chave
+    fonte = "FROM resumo_ops r WHERE r.op_id = new.id"
+    c.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS rollups_ops_au AFTER UPDATE OF cliente, tipo, data_criacao ON ops BEGIN
+            {somar(fonte, "old.cliente", "old.tipo", "old.data_criacao", "-r.pares", "-r.pares_ok")}
+            {somar(fonte, "new.cliente", "new.tipo", "new.data_criacao", "r.pares", "r.pares_ok")}
+        END
+        """
+    )
+
+    # Carga inicial a partir de agregados
+    c.execute("DELETE FROM rollups")
+    c.execute(
+        """
+        INSERT INTO rollups (dimensao, chave, pares, pares_ok)
+        SELECT 'cliente', o.cliente, sum(a.pares), sum(CASE WHEN a.status = 'ok' THEN a.pares ELSE 0 END)
+        FROM agregados a JOIN ops o ON o.id = a.op_id GROUP BY o.cliente
+        UNION ALL
+        SELECT 'tipo', o.tipo, sum(a.pares), sum(CASE WHEN a.status = 'ok' THEN a.pares ELSE 0 END)
+        FROM agregados a JOIN ops o ON o.id = a.op_id GROUP BY o.tipo
+        UNION ALL
+        SELECT 'dia', substr(o.data_criacao, 1, 10), sum(a.pares),
+               sum(CASE WHEN a.status = 'ok' THEN a.pares ELSE 0 END)
+        FROM agregados a JOIN ops o ON o.id = a.op_id GROUP BY substr(o.data_criacao, 1, 10)
+        UNION ALL
+        SELECT 'tamanho', a.numeracao, sum(a.pares), sum(CASE WHEN a.status = 'ok' THEN a.pares ELSE 0 END)
+        FROM agregados a GROUP BY a.numeracao
+        """
+    )
+
+
+# Em ordem: a migração i leva o banco da versão i à i + 1. Nunca altere uma
+# migração já publicada; acrescente uma nova ao fim da lista.
+MIGRACOES: List[Callable[[sqlite3.Cursor], None]] = [
+    _v1_esquema_base,
+    _v2_indices,
+    _v3_busca,
+    _v4_taloes_por_celula,
+    _v5_status_por_talao,
+    _v6_agregados,
+    _v7_rollups,
+]
+VERSAO_ATUAL = len(MIGRACOES)
+
+
+# ========
+# Execução
+# ========
+
+def versao_esquema(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """Aplica as migrações pendentes; retorna (versão anterior, versão final).
+
+    Cada migração roda numa transação com a gravação de ``user_version``: uma
+    falha desfaz só a migração corrente e o banco fica na última versão boa.
+    """
+    inicial = versao_esquema(conn)
+    if inicial == VERSAO_ATUAL:
+        return inicial, inicial
+    if inicial > VERSAO_ATUAL:
+        raise VersaoEsquemaIncompativel(
+            f"Banco na versão {inicial}, mas este app conhece até a {VERSAO_ATUAL}. "
+            "Atualize o programa."
+        )
+    if conn.in_transaction:
+        conn.commit()
+    # Reconstruções de tabela exigem FKs desligadas (não muda dentro de transação)
+    fks = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        for versao in range(inicial, VERSAO_ATUAL):
+            c = conn.cursor()
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                MIGRACOES[versao](c)
+                c.execute(f"PRAGMA user_version = {versao + 1}")
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+    finally:
+        conn.execute(f"PRAGMA foreign_keys={'ON' if fks else 'OFF'}")
+    return inicial, VERSAO_ATUAL
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Atualiza o esquema do banco de OPs.")
+    parser.add_argument("banco", nargs="?", default="producao_calcados.db")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.banco)
+    try:
+        inicial, final = migrar(conn)
+    except VersaoEsquemaIncompativel as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    if inicial == final:
+        print(f"Banco já está na versão {final}.")
+    else:
+        print(f"Banco atualizado da versão {inicial} para a {final}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
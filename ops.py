@@ -16,79 +16,58 @@ Observações:
 - Dependências: PyQt5 (pip install PyQt5). Somente stdlib + PyQt5.
 - Rode assim:  python app_op_calcados.py
 - O arquivo de banco padrão é: producao_calcados.db (na mesma pasta).
+- Acesso ao banco (conexões persistentes, consultas) fica em banco.py.
 
 Autor: você 💜
 """
 
+import time
+
+_INICIO = time.perf_counter()  # referência do --medir-inicio: inclui os imports abaixo
+
 import sys
+
+if __name__ == "__main__" and sys.argv[1:2] and (sys.argv[1] == "--banco" or not sys.argv[1].startswith("-")):
+    # python -m ops [--banco X] <subcomando>: linha de comando sem interface, antes de importar o Qt
+    from linha_comando import main as _main_cli
+
+    sys.exit(_main_cli())
+
 import os
-import csv
 import sqlite3
-from datetime import datetime, time
-from typing import Dict, List, Tuple
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
-from PyQt5.QtGui import QFont
+from PyQt5.QtCore import (
+    Qt, QAbstractTableModel, QModelIndex, QVariant, QEvent, QRect, QObject, QRunnable, QThreadPool,
+    QTimer, pyqtSignal,
+)
+from PyQt5.QtGui import QFont, QColor
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QStackedWidget, QMessageBox, QTableWidget, QTableWidgetItem,
-    QGroupBox, QFormLayout, QSizePolicy, QSpacerItem, QTabWidget, QTableView,
-    QHeaderView, QAbstractItemView, QToolButton, QStyle, QFileDialog, QComboBox,
-    QStyledItemDelegate, QSpinBox
+    QPushButton, QStackedWidget, QMessageBox,
+    QGroupBox, QFormLayout, QSizePolicy, QTabWidget, QTableView,
+    QHeaderView, QAbstractItemView, QFileDialog, QComboBox,
+    QStyledItemDelegate, QSpinBox, QInputDialog, QProgressDialog
 )
-import pyautogui
-
-# ==========================
-# Configurações da Aplicação
-# ==========================
-DATABASE_PATH = "producao_calcados.db"
-TAMANHOS = ["4", "4x", "5x", "6", "7", "7x", "8x", "9x", "10", "11", "12"]
-GIROS = [1, 2, 3, 4, 5]
-PARES_POR_TALAO = 20  # Agora cada talão terá 20 pares
 
-# ==============
-# Banco de Dados
-# ==============
-
-def criar_banco():
-    novo_banco = not os.path.exists(DATABASE_PATH)
-    conn = sqlite3.connect(DATABASE_PATH)
-    c = conn.cursor()
-
-    # Tabelas
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS ops (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cliente TEXT NOT NULL,
-            num_op INTEGER UNIQUE NOT NULL,
-            data_criacao TEXT NOT NULL,
-            total_pares INTEGER NOT NULL
-        )
-        """
-    )
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS taloes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            op_id INTEGER NOT NULL,
-            giro INTEGER NOT NULL,
-            talao_num INTEGER NOT NULL,
-            numeracao TEXT NOT NULL,
-            quantidade INTEGER NOT NULL DEFAULT 0,
-            status TEXT NOT NULL DEFAULT 'pendente',
-            FOREIGN KEY (op_id) REFERENCES ops (id)
-        )
-        """
-    )
-
-    # Índices para performance em listas/pesquisas
-    c.execute("CREATE INDEX IF NOT EXISTS idx_ops_numop ON ops(num_op)")
-    c.execute("CREATE INDEX IF NOT EXISTS idx_taloes_op_giro ON taloes(op_id, giro)")
+import banco
+from banco import (
+    TAMANHOS, GIROS, PARES_POR_TALAO, TIPOS, ORDEM_PADRAO, NUM_OP_MAX, so_digitos,
+    criar_banco, fechar_conexoes, gerenciador, consultar_ops, consultar_progresso, chave_pagina,
+    TaloesGiro, STATUS_OK, STATUS_PENDENTE, StatusTalao, LinhaPainel,
+)
+from exportacao import LAYOUT_LARGO, LAYOUT_LONGO, ExportacaoCancelada, exportar_csv
+from importacao import analisar_arquivo, importar_arquivo
+from validacao import SOMA_TALAO, FORA_DA_GRADE, validar_op
 
-    conn.commit()
-    conn.close()
-    return novo_banco
+# De onde as telas leem e gravam as OPs: o módulo ``banco`` (arquivo local) ou,
+# com ``--servidor URL``, uma ``servidor.ClienteAPI`` com as mesmas funções.
+# ERROS_FONTE: falhas dessa fonte que as telas mostram em vez de deixar escapar
+# (num slot/método virtual do Qt, uma exceção derruba o processo)
+fonte_dados = banco
+ERROS_FONTE: Tuple = (sqlite3.Error,)
 
 # ==============
 # Estilos (QSS)
@@ -155,108 +134,6 @@ QTableWidget::item:selected {
 }
 """
 
-# =====================
-# Utilidades de Banco
-# =====================
-
-def inserir_op(cliente: str, num_op: int, total_pares: int, tipo: str) -> int:
-    conn = sqlite3.connect(DATABASE_PATH)
-    c = conn.cursor()
-    data_criacao = datetime.now().strftime("%Y-%m-%d %H:%M")
-    c.execute(
-        "INSERT INTO ops (cliente, num_op, data_criacao, total_pares, tipo) VALUES (?, ?, ?, ?, ?)",
-        (cliente, num_op, data_criacao, total_pares, tipo),
-    )
-    op_id = c.lastrowid
-    conn.commit()
-    conn.close()
-    return op_id
-
-
-def gerar_taloes_iniciais(op_id: int, total_pares: int, tipo: str):
-    if tipo == "Masculino":
-        tamanhos = ["7", "7x", "8x", "9x", "10", "11", "12"]
-        taloes_por_tamanho = [1, 1, 2, 3, 2, 2, 1]
-    else:
-        tamanhos = ["4", "4x", "5", "6", "7", "7x", "8x"]
-        taloes_por_tamanho = [1, 1, 3, 3, 2, 1, 1]
-
-    conn = sqlite3.connect(DATABASE_PATH)
-    c = conn.cursor()
-    pares_restantes = total_pares
-
-    for giro in GIROS:
-        talao_num = 1
-        for idx, tam in enumerate(tamanhos):
-            for _ in range(taloes_por_tamanho[idx]):
-                if pares_restantes <= 0:
-                    break
-                qtd = min(PARES_POR_TALAO, pares_restantes)
-                c.execute(
-                    "INSERT INTO taloes (op_id, giro, talao_num, numeracao, quantidade) VALUES (?, ?, ?, ?, ?)",
-                    (op_id, giro, talao_num, tam, qtd),
-                )
-                pares_restantes -= qtd
-                talao_num += 1
-        if pares_restantes <= 0:
-            break
-    conn.commit()
-    conn.close()
-
-
-def listar_ops(filtro: str = "") -> List[Tuple]:
-    conn = sqlite3.connect(DATABASE_PATH)
-    c = conn.cursor()
-    if filtro:
-        like = f"%{filtro}%"
-        c.execute(
-            "SELECT id, cliente, num_op, data_criacao, total_pares FROM ops WHERE cliente LIKE ? OR CAST(num_op AS TEXT) LIKE ? ORDER BY data_criacao DESC",
-            (like, like),
-        )
-    else:
-        c.execute(
-            "SELECT id, cliente, num_op, data_criacao, total_pares FROM ops ORDER BY data_criacao DESC"
-        )
-    rows = c.fetchall()
-    conn.close()
-    return rows
-
-
-def carregar_taloes(op_id: int) -> Dict[int, Dict[int, Dict[str, int]]]:
-    """Retorna estrutura: {giro: {talao_num: {tamanho: qtd}}} ordenada por giro, talão."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    c = conn.cursor()
-    c.execute(
-        "SELECT giro, talao_num, numeracao, quantidade FROM taloes WHERE op_id = ? ORDER BY giro, talao_num",
-        (op_id,),
-    )
-    dados = c.fetchall()
-    conn.close()
-
-    giros: Dict[int, Dict[int, Dict[str, int]]] = {g: {} for g in GIROS}
-    for giro, talao_num, numeracao, quantidade in dados:
-        if talao_num not in giros[giro]:
-            giros[giro][talao_num] = {num: 0 for num in TAMANHOS}
-        giros[giro][talao_num][numeracao] = quantidade
-    return giros
-
-
-def salvar_taloes(op_id: int, giros: Dict[int, Dict[int, Dict[str, int]]]) -> None:
-    conn = sqlite3.connect(DATABASE_PATH)
-    c = conn.cursor()
-    for giro, taloes in giros.items():
-        for talao_num, tamanhos in taloes.items():
-            for numeracao, quantidade in tamanhos.items():
-                c.execute(
-                    """
-                    UPDATE taloes SET quantidade = ?
-                    WHERE op_id = ? AND giro = ? AND talao_num = ? AND numeracao = ?
-                    """,
-                    (quantidade, op_id, giro, talao_num, numeracao),
-                )
-    conn.commit()
-    conn.close()
-
 # ========================
 # Delegates (Editor célula)
 # ========================
@@ -277,20 +154,648 @@ class SpinBoxDelegate(QStyledItemDelegate):
     def setModelData(self, editor, model, index):
         model.setData(index, editor.value(), Qt.EditRole)
 
+
+class BotoesAcaoDelegate(QStyledItemDelegate):
+    """Desenha botões de ação numa coluna sem criar widgets por linha.
+
+    Os botões são só pintura; o clique é resolvido em ``editorEvent`` e
+    repassado pelo sinal ``acionado(chave, acao)``, onde ``chave`` é o valor
+    de ``Qt.UserRole`` da linha (linhas sem chave não têm botões).
+    """
+
+    acionado = pyqtSignal(int, str)
+
+    BOTOES: List[Tuple[str, str, QColor]] = []
+    LARGURA_BOTAO = 90
+    ALTURA_BOTAO = 36
+    ESPACO = 16
+    TAMANHO_FONTE = 14
+
+    def _retangulos(self, rect: QRect) -> List[Tuple[str, str, QColor, QRect]]:
+        altura = min(self.ALTURA_BOTAO, rect.height())
+        y = rect.top() + (rect.height() - altura) // 2
+        x = rect.left()
+        saida = []
+        for acao, texto, cor in self.BOTOES:
+            saida.append((acao, texto, cor, QRect(x, y, self.LARGURA_BOTAO, altura)))
+            x += self.LARGURA_BOTAO + self.ESPACO
+        return saida
+
+    def paint(self, painter, option, index):
+        if index.data(Qt.UserRole) is None:
+            return
+        painter.save()
+        fonte = QFont(option.font)
+        fonte.setBold(True)
+        fonte.setPixelSize(self.TAMANHO_FONTE)
+        painter.setFont(fonte)
+        for _acao, texto, cor, r in self._retangulos(option.rect):
+            painter.fillRect(r, cor)
+            painter.setPen(Qt.white)
+            painter.drawText(r, Qt.AlignCenter, texto)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        chave = index.data(Qt.UserRole)
+        if chave is not None and event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            for acao, _texto, _cor, r in self._retangulos(option.rect):
+                if r.contains(event.pos()):
+                    self.acionado.emit(int(chave), acao)
+                    return True
+        return False
+
+
+class AcoesOPDelegate(BotoesAcaoDelegate):
+    """Botões Abrir / Exportar CSV / Excluir da lista de OPs (chave: op_id)."""
+
+    BOTOES = [
+        ("abrir", "Abrir", QColor("#7c4dff")),
+        ("exportar", "Exportar CSV", QColor("#43d96b")),
+        ("excluir", "Excluir", QColor("#ff4d6d")),
+    ]
+
+
+class AcoesTalaoDelegate(BotoesAcaoDelegate):
+    """Botões Pendente / OK da grade do GIRO (chave: talao_num)."""
+
+    BOTOES = [
+        ("pendente", "Pendente", QColor("#ff4d6d")),
+        ("ok", "OK", QColor("#43d96b")),
+    ]
+    LARGURA_BOTAO = 100
+    ALTURA_BOTAO = 40
+    ESPACO = 8
+    TAMANHO_FONTE = 15
+
+# ==============
+# Modelos (Qt)
+# ==============
+
+class OPsTableModel(QAbstractTableModel):
+    """Lista de OPs carregada por páginas sob demanda (canFetchMore/fetchMore).
+
+    As páginas seguintes são buscadas por keyset a partir da última linha;
+    só a busca por relevância (filtro sem ordenação escolhida) usa deslocamento.
+    """
+
+    CABECALHOS = ["ID", "Cliente", "Nº OP", "Criada em", "Total Pares", "Pares OK", "Pendentes", "Ações"]
+    ORDEM_POR_COLUNA = {0: "id", 1: "cliente", 2: "num_op", 3: "data_criacao", 4: "total_pares"}
+    COL_OK = 5
+    COL_PENDENTES = 6
+    COL_ACOES = 7
+    TAMANHO_PAGINA = 200
+
+    falhou = pyqtSignal(str)  # carga de página/progresso falhou (servidor fora do ar…)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._linhas: List[Tuple] = []
+        self._progresso: Dict[int, Tuple[int, int]] = {}  # op_id -> (pares, pares_ok), de resumo_ops
+        self._filtro = ""
+        self._fim = True
+        self.ordem: Optional[str] = None  # None: relevância (com filtro) ou mais recentes
+        self.decrescente = True
+
+    def ordenar_por_coluna(self, coluna: int, decrescente: bool) -> bool:
+        """Escolhe a ordenação; retorna False se a coluna não é ordenável."""
+        if coluna not in self.ORDEM_POR_COLUNA:
+            return False
+        self.ordem = self.ORDEM_POR_COLUNA[coluna]
+        self.decrescente = decrescente
+        return True
+
+    def recarregar(self, filtro: str = ""):
+        try:
+            primeira_pagina = fonte_dados.listar_ops(
+                filtro, limite=self.TAMANHO_PAGINA, ordem=self.ordem, decrescente=self.decrescente
+            )
+        except ERROS_FONTE as e:
+            self.falhou.emit(str(e))
+            return
+        self.aplicar(filtro, primeira_pagina, self._carregar_progresso(primeira_pagina))
+
+    def aplicar(self, filtro: str, primeira_pagina: List[Tuple], progresso: Dict[int, Tuple[int, int]]):
+        """Troca o conteúdo pelo resultado (primeira página e seu progresso) de uma busca."""
+        self.beginResetModel()
+        self._filtro = filtro
+        self._linhas = list(primeira_pagina)
+        self._progresso = dict(progresso)
+        self._fim = len(primeira_pagina) < self.TAMANHO_PAGINA
+        self.endResetModel()
+
+    def _carregar_progresso(self, linhas: List[Tuple]) -> Dict[int, Tuple[int, int]]:
+        try:
+            return fonte_dados.progresso_ops([linha[0] for linha in linhas])
+        except ERROS_FONTE as e:
+            self.falhou.emit(str(e))
+            return {}
+
+    def op_id(self, row: int) -> int:
+        return self._linhas[row][0]
+
+    # ---- carga preguiçosa ----
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self._fim
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        try:
+            if self._filtro and self.ordem is None:
+                pagina = fonte_dados.listar_ops(
+                    self._filtro, limite=self.TAMANHO_PAGINA, deslocamento=len(self._linhas)
+                )
+            else:
+                apos = chave_pagina(self._linhas[-1], self.ordem or ORDEM_PADRAO) if self._linhas else None
+                pagina = fonte_dados.listar_ops(
+                    self._filtro, limite=self.TAMANHO_PAGINA, ordem=self.ordem, decrescente=self.decrescente,
+                    apos=apos,
+                )
+        except ERROS_FONTE as e:
+            # Para de pedir páginas até a próxima busca (senão a view insiste a cada rolagem)
+            self._fim = True
+            self.falhou.emit(str(e))
+            return
+        self._fim = len(pagina) < self.TAMANHO_PAGINA
+        if not pagina:
+            return
+        inicio = len(self._linhas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(pagina) - 1)
+        self._linhas.extend(pagina)
+        self._progresso.update(self._carregar_progresso(pagina))
+        self.endInsertRows()
+
+    # ---- interface do modelo ----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.CABECALHOS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        linha = self._linhas[index.row()]
+        if role == Qt.UserRole:
+            return linha[0]
+        if role == Qt.DisplayRole and index.column() in (self.COL_OK, self.COL_PENDENTES):
+            pares, pares_ok = self._progresso.get(linha[0], (0, 0))
+            return str(pares_ok if index.column() == self.COL_OK else pares - pares_ok)
+        if role == Qt.DisplayRole and index.column() != self.COL_ACOES:
+            return str(linha[index.column()])
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.CABECALHOS[section]
+        return QVariant()
+
+COR_INVALIDO = QColor("#5c1a28")  # fundo das células com problema que impede salvar
+COR_AVISO = QColor("#5c4a1a")     # fundo das células com aviso (tamanho fora da grade)
+COR_STATUS = {STATUS_PENDENTE: QColor(Qt.red), STATUS_OK: QColor("#2e7d32")}
+TEXTO_STATUS = {STATUS_PENDENTE: "Pendente", STATUS_OK: "OK"}
+
+
+class GiroTableModel(QAbstractTableModel):
+    """Grade de um GIRO sobre uma matriz compacta de inteiros (talão × tamanho).
+
+    Os totais por talão, por tamanho e do giro ficam em arrays e são ajustados
+    pela diferença a cada edição, sem reler as outras células.
+    """
+
+    CABECALHOS = ["Talão", "Talão id", "Numeração"] + TAMANHOS + ["Qtd. Produto", "TOTAL TALÃO", "Status", "Ações"]
+    COL_PRIMEIRO_TAMANHO = 3
+    COL_QTD_PRODUTO = COL_PRIMEIRO_TAMANHO + len(TAMANHOS)
+    COL_TOTAL = COL_QTD_PRODUTO + 1
+    COL_STATUS = COL_TOTAL + 1
+    COL_ACOES = COL_STATUS + 1
+
+    total_alterado = pyqtSignal(int, int)  # giro, diferença de pares
+
+    def __init__(
+        self, op_id: int, giro: int, dados: TaloesGiro,
+        status: Optional[Dict[int, StatusTalao]] = None, parent=None,
+    ):
+        super().__init__(parent)
+        self.giro = giro
+        self._definir(op_id, dados, status)
+
+    def recarregar(self, op_id: int, dados: TaloesGiro, status: Optional[Dict[int, StatusTalao]] = None):
+        """Troca o conteúdo por outra OP/carga, reaproveitando modelo e tabela."""
+        self.beginResetModel()
+        self._definir(op_id, dados, status)
+        self.endResetModel()
+
+    def _definir(self, op_id: int, dados: TaloesGiro, status: Optional[Dict[int, StatusTalao]]):
+        self.op_id = op_id
+        self.status: Dict[int, StatusTalao] = dict(status or {})  # talao_num -> (status, alterado_em)
+        self.dados = dados.copia()  # cópia de trabalho; o original fica como "salvo"
+        self.taloes = self.dados.taloes
+        self.qtd = self.dados.qtd
+        self.total_linha = self.dados.somas_linhas()
+        self.total_coluna = self.dados.somas_colunas()
+        self.total = sum(self.total_linha)
+        # Células editadas desde a carga/último salvamento: (talao_num, tamanho) -> qtd
+        self.alteradas: Dict[Tuple[int, str], int] = {}
+        self._originais: Dict[Tuple[int, str], int] = {}
+        # Destaques da validação contínua: talões que impedem salvar e células com aviso
+        self._taloes_invalidos: Set[int] = set()
+        self._celulas_aviso: Set[Tuple[int, str]] = set()
+
+    def marcar_violacoes(self, taloes: Set[int], celulas_aviso: Set[Tuple[int, str]]):
+        if taloes == self._taloes_invalidos and celulas_aviso == self._celulas_aviso:
+            return
+        self._taloes_invalidos = taloes
+        self._celulas_aviso = celulas_aviso
+        self.dataChanged.emit(
+            self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1), [Qt.BackgroundRole]
+        )
+
+    def marcar_salvo(self):
+        self.alteradas.clear()
+        self._originais.clear()
+
+    def definir_status(self, talao_num: int, status: str, momento: Optional[str] = None) -> Optional[StatusTalao]:
+        """Troca o status exibido do talão; retorna o anterior (None se não mudou)."""
+        anterior = self.status.get(talao_num, (STATUS_PENDENTE, None))
+        if anterior == (status, momento) or (momento is None and anterior[0] == status):
+            return None
+        self.status[talao_num] = (status, momento)
+        r = self.taloes.index(talao_num)
+        self.dataChanged.emit(self.index(r, self.COL_STATUS), self.index(r, self.COL_STATUS))
+        return anterior
+
+    # ---- interface do modelo ----
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.taloes) + 1  # + TOTAL LOTE
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.CABECALHOS)
+
+    def _eh_tamanho(self, index) -> bool:
+        return index.row() < len(self.taloes) and self.COL_PRIMEIRO_TAMANHO <= index.column() < self.COL_QTD_PRODUTO
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if self._eh_tamanho(index):
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        r, c = index.row(), index.column()
+        n = len(TAMANHOS)
+        linha_total = r == len(self.taloes)
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if linha_total:
+                if c == 0:
+                    return "TOTAL LOTE"
+                if self.COL_PRIMEIRO_TAMANHO <= c < self.COL_QTD_PRODUTO:
+                    return self.total_coluna[c - self.COL_PRIMEIRO_TAMANHO]
+                if c in (self.COL_QTD_PRODUTO, self.COL_TOTAL):
+                    return self.total
+                return QVariant()
+            talao_num = self.taloes[r]
+            if c == 0:
+                return talao_num
+            if c == 1:
+                return f"ID_{self.op_id}_{self.giro}_{talao_num}"
+            if c == 2:
+                return "/".join(TAMANHOS[j] for j in range(n) if self.qtd[r * n + j] > 0)
+            if c < self.COL_QTD_PRODUTO:
+                return self.qtd[r * n + c - self.COL_PRIMEIRO_TAMANHO]
+            if c in (self.COL_QTD_PRODUTO, self.COL_TOTAL):
+                return self.total_linha[r]
+            if c == self.COL_STATUS:
+                return TEXTO_STATUS[self.status.get(talao_num, (STATUS_PENDENTE, None))[0]]
+            return QVariant()
+        if role == Qt.TextAlignmentRole and c >= self.COL_PRIMEIRO_TAMANHO:
+            return Qt.AlignCenter
+        if role == Qt.BackgroundRole and not linha_total:
+            talao_num = self.taloes[r]
+            if c == self.COL_STATUS:
+                return COR_STATUS[self.status.get(talao_num, (STATUS_PENDENTE, None))[0]]
+            if c in (self.COL_QTD_PRODUTO, self.COL_TOTAL) and talao_num in self._taloes_invalidos:
+                return COR_INVALIDO
+            if (
+                self.COL_PRIMEIRO_TAMANHO <= c < self.COL_QTD_PRODUTO
+                and (talao_num, TAMANHOS[c - self.COL_PRIMEIRO_TAMANHO]) in self._celulas_aviso
+            ):
+                return COR_AVISO
+        if role == Qt.ToolTipRole and not linha_total and c == self.COL_STATUS:
+            status, momento = self.status.get(self.taloes[r], (STATUS_PENDENTE, None))
+            return f"{TEXTO_STATUS[status]} desde {momento}" if momento else "Pendente desde a criação da OP"
+        if role == Qt.UserRole and not linha_total:
+            return self.taloes[r]
+        return QVariant()
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid() or not self._eh_tamanho(index):
+            return False
+        try:
+            novo = max(0, min(int(value), 0xFFFF))
+        except (TypeError, ValueError):
+            return False
+        n = len(TAMANHOS)
+        r, j = index.row(), index.column() - self.COL_PRIMEIRO_TAMANHO
+        pos = r * n + j
+        antigo = self.qtd[pos]
+        delta = novo - antigo
+        if delta == 0:
+            return True
+
+        self.qtd[pos] = novo
+        self.total_linha[r] += delta
+        self.total_coluna[j] += delta
+        self.total += delta
+
+        chave = (self.taloes[r], TAMANHOS[j])
+        original = self._originais.setdefault(chave, antigo)
+        if novo == original:
+            self.alteradas.pop(chave, None)
+        else:
+            self.alteradas[chave] = novo
+
+        ultima = len(self.taloes)
+        self.dataChanged.emit(index, index)
+        self.dataChanged.emit(self.index(r, 2), self.index(r, 2))
+        self.dataChanged.emit(self.index(r, self.COL_QTD_PRODUTO), self.index(r, self.COL_TOTAL))
+        self.dataChanged.emit(self.index(ultima, index.column()), self.index(ultima, index.column()))
+        self.dataChanged.emit(self.index(ultima, self.COL_QTD_PRODUTO), self.index(ultima, self.COL_TOTAL))
+        self.total_alterado.emit(self.giro, delta)
+        return True
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.CABECALHOS[section]
+        return QVariant()
+
+class ResumoTableModel(QAbstractTableModel):
+    """Linhas (chave, pares, pares_ok) de um corte do painel, com pendentes e %."""
+
+    COLUNAS = ["Pares", "OK", "Pendentes", "% OK"]
+
+    def __init__(self, rotulo: str, parent=None):
+        super().__init__(parent)
+        self.cabecalhos = [rotulo] + self.COLUNAS
+        self._linhas: List[LinhaPainel] = []
+
+    def aplicar(self, linhas: List[LinhaPainel]):
+        self.beginResetModel()
+        self._linhas = list(linhas)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.cabecalhos)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        chave, pares, pares_ok = self._linhas[index.row()]
+        c = index.column()
+        if role == Qt.DisplayRole:
+            if c == 0:
+                return str(chave)
+            if c == 4:
+                return f"{100 * pares_ok / pares:.1f}%" if pares else "-"
+            return str((pares, pares_ok, pares - pares_ok)[c - 1])
+        if role == Qt.TextAlignmentRole and c > 0:
+            return Qt.AlignCenter
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.cabecalhos[section]
+        return QVariant()
+
+# ============================
+# Tarefas em segundo plano
+# ============================
+
+class SinaisBusca(QObject):
+    concluida = pyqtSignal(int, str, object, object)  # geração, filtro, linhas, progresso
+    falhou = pyqtSignal(int, str)                     # geração, erro (servidor fora do ar…)
+
+
+class BuscaOPsTarefa(QRunnable):
+    """Busca de OPs numa conexão somente-leitura do pool, fora da thread da UI.
+
+    O progresso das OPs encontradas vem junto, na mesma tarefa: a thread da
+    UI só troca o conteúdo do modelo. ``cancelar()`` interrompe a consulta em andamento (sqlite3 interrupt) e
+    descarta o resultado; só a busca mais recente chega ao modelo.
+    """
+
+    def __init__(
+        self, geracao: int, filtro: str, limite: int, sinais: SinaisBusca,
+        ordem: Optional[str] = None, decrescente: bool = True,
+    ):
+        super().__init__()
+        self.geracao = geracao
+        self.filtro = filtro
+        self.limite = limite
+        self.ordem = ordem
+        self.decrescente = decrescente
+        self.sinais = sinais
+        self._lock = threading.Lock()
+        self._conn = None
+        self._cancelada = False
+
+    def cancelar(self):
+        with self._lock:
+            self._cancelada = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+    def run(self):
+        if fonte_dados is not banco:
+            self._buscar_no_servidor()
+            return
+        try:
+            with gerenciador().leitura() as c:
+                with self._lock:
+                    if self._cancelada:
+                        return
+                    self._conn = c.connection
+                try:
+                    linhas = consultar_ops(
+                        c, self.filtro, self.limite, ordem=self.ordem, decrescente=self.decrescente
+                    )
+                    progresso = consultar_progresso(c, [linha[0] for linha in linhas])
+                finally:
+                    with self._lock:
+                        self._conn = None
+        except sqlite3.Error as e:
+            # Interrompida por cancelar(): resultado descartado; qualquer outra
+            # falha (banco bloqueado, esquema faltando…) vai para a tela
+            if not self._cancelada:
+                self.sinais.falhou.emit(self.geracao, str(e))
+            return
+        except ValueError:
+            # Filtro que não vira consulta válida: lista vazia em vez de a busca morrer calada
+            linhas, progresso = [], {}
+        if not self._cancelada:
+            self.sinais.concluida.emit(self.geracao, self.filtro, linhas, progresso)
+
+    def _buscar_no_servidor(self):
+        # Sem como interromper a consulta remota: só descarta o resultado se cancelada
+        try:
+            linhas = fonte_dados.listar_ops(
+                self.filtro, self.limite, ordem=self.ordem, decrescente=self.decrescente
+            )
+            progresso = {} if self._cancelada else fonte_dados.progresso_ops([linha[0] for linha in linhas])
+        except ERROS_FONTE as e:
+            if not self._cancelada:
+                self.sinais.falhou.emit(self.geracao, str(e))
+            return
+        if not self._cancelada:
+            self.sinais.concluida.emit(self.geracao, self.filtro, linhas, progresso)
+
+
+class SinaisStatus(QObject):
+    gravado = pyqtSignal(int, int, int, str, str)         # op_id, giro, talão, status, momento
+    falhou = pyqtSignal(int, int, int, str, object, str)  # op_id, giro, talão, status, anterior, erro
+
+
+class GravarStatusTarefa(QRunnable):
+    """Grava o status de um talão fora da thread da UI (a tela já mostra o novo)."""
+
+    def __init__(self, sinais: SinaisStatus, op_id: int, giro: int, talao_num: int, status: str, anterior):
+        super().__init__()
+        self.sinais = sinais
+        self.op_id = op_id
+        self.giro = giro
+        self.talao_num = talao_num
+        self.status = status
+        self.anterior = anterior
+
+    def run(self):
+        try:
+            momento = fonte_dados.definir_status_talao(self.op_id, self.giro, self.talao_num, self.status)
+        except Exception as e:
+            self.sinais.falhou.emit(self.op_id, self.giro, self.talao_num, self.status, self.anterior, str(e))
+        else:
+            self.sinais.gravado.emit(self.op_id, self.giro, self.talao_num, self.status, momento)
+
+class SinaisTarefa(QObject):
+    progresso = pyqtSignal(int, int, str)  # feito, total, texto
+    concluida = pyqtSignal(object)         # resultado da função
+    cancelada = pyqtSignal()
+    falhou = pyqtSignal(str)
+
+
+class TarefaComProgresso(QRunnable):
+    """Roda ``funcao(progresso)`` numa thread do pool (exportação, importação…).
+
+    ``progresso(feito, total, texto)`` repassa o andamento à UI e retorna False
+    depois que o usuário pediu o cancelamento.
+    """
+
+    def __init__(self, sinais: SinaisTarefa, funcao: Callable):
+        super().__init__()
+        self.sinais = sinais
+        self.funcao = funcao
+        self._cancelada = False
+
+    def cancelar(self):
+        self._cancelada = True
+
+    def _progresso(self, feito: int, total: int, texto: str) -> bool:
+        self.sinais.progresso.emit(feito, total, texto)
+        return not self._cancelada
+
+    def run(self):
+        try:
+            resultado = self.funcao(self._progresso)
+        except ExportacaoCancelada:
+            self.sinais.cancelada.emit()
+        except Exception as e:
+            self.sinais.falhou.emit(str(e))
+        else:
+            self.sinais.concluida.emit(resultado)
+
+
+def executar_com_progresso(parent: QWidget, titulo: str, funcao: Callable, ao_concluir: Callable):
+    """Executa ``funcao`` em segundo plano com um QProgressDialog e botão Cancelar."""
+    dialogo = QProgressDialog(f"{titulo}…", "Cancelar", 0, 0, parent)
+    dialogo.setWindowTitle(titulo)
+    dialogo.setWindowModality(Qt.WindowModal)
+    dialogo.setMinimumDuration(300)
+    sinais = SinaisTarefa(dialogo)
+    tarefa = TarefaComProgresso(sinais, funcao)
+
+    def progresso(feito: int, total: int, texto: str):
+        dialogo.setMaximum(max(total, 1))
+        dialogo.setValue(min(feito, max(total, 1)))
+        dialogo.setLabelText(f"{titulo}… {texto}")
+
+    def encerrar():
+        dialogo.canceled.disconnect(tarefa.cancelar)
+        dialogo.reset()
+        dialogo.deleteLater()
+
+    def concluida(resultado):
+        encerrar()
+        ao_concluir(resultado)
+
+    def cancelada():
+        encerrar()
+        QMessageBox.information(parent, titulo, "Operação cancelada. Nenhum arquivo foi gravado.")
+
+    def falhou(erro: str):
+        encerrar()
+        QMessageBox.critical(parent, "Erro", f"{titulo}: falha.\n\n{erro}")
+
+    sinais.progresso.connect(progresso)
+    sinais.concluida.connect(concluida)
+    sinais.cancelada.connect(cancelada)
+    sinais.falhou.connect(falhou)
+    dialogo.canceled.connect(tarefa.cancelar)
+    QThreadPool.globalInstance().start(tarefa)
+
+
+def exportar_em_segundo_plano(parent: QWidget, caminho: str, mensagem_ok: str, **opcoes):
+    """Exporta CSV em segundo plano; escrita atômica, com progresso e cancelamento."""
+
+    def funcao(progresso):
+        exportar = exportar_csv if fonte_dados is banco else fonte_dados.exportar_csv
+        return exportar(
+            caminho,
+            progresso=lambda ops, total, linhas: progresso(ops, total, f"{ops}/{total} OPs · {linhas} linhas"),
+            **opcoes,
+        )
+
+    def ao_concluir(resultado):
+        n_ops, _linhas = resultado
+        QMessageBox.information(parent, "Exportar", mensagem_ok.format(ops=n_ops))
+
+    executar_com_progresso(parent, "Exportando CSV", funcao, ao_concluir)
+
 # ===================
 # Telas da Aplicação
 # ===================
 
 class ListaOPsPage(QWidget):
-    def __init__(self, abrir_op_callback, criar_op_callback):
+    op_excluida = pyqtSignal(int)
+
+    def __init__(self, abrir_op_callback, criar_op_callback, painel_callback=None):
         super().__init__()
         self.abrir_op_callback = abrir_op_callback
         self.criar_op_callback = criar_op_callback
+        self.painel_callback = painel_callback
+        self._geracao_busca = 0
+        self._busca_em_andamento: Optional[BuscaOPsTarefa] = None
+        self._sinais_busca = SinaisBusca(self)
+        self._sinais_busca.concluida.connect(self._busca_concluida)
+        self._sinais_busca.falhou.connect(self._busca_falhou)
         self._setup_ui()
         self.atualizar()
 
     def _setup_ui(self):
-        self.setStyleSheet(APP_QSS)
         root = QVBoxLayout(self)
         root.setContentsMargins(0, 0, 0, 0)
 
@@ -302,13 +807,31 @@ class ListaOPsPage(QWidget):
 
         self.busca = QLineEdit()
         self.busca.setPlaceholderText("Buscar por cliente ou Nº OP…")
-        self.busca.textChanged.connect(self.atualizar)
+        # Busca com debounce: só consulta quando a digitação pausa
+        self._timer_busca = QTimer(self)
+        self._timer_busca.setSingleShot(True)
+        self._timer_busca.setInterval(250)
+        self._timer_busca.timeout.connect(self.atualizar)
+        self.busca.textChanged.connect(self._timer_busca.start)
         header.addWidget(self.busca)
 
         bt_novo = QPushButton("+ Nova OP")
         bt_novo.setMinimumWidth(120)
         bt_novo.clicked.connect(self.criar_op_callback)
         header.addWidget(bt_novo)
+
+        bt_importar = QPushButton("Importar")
+        bt_importar.setMinimumWidth(120)
+        bt_importar.clicked.connect(self._importar)
+        # A importação analisa e grava direto no arquivo do banco: só no modo local
+        bt_importar.setVisible(fonte_dados is banco)
+        header.addWidget(bt_importar)
+
+        if self.painel_callback:
+            bt_painel = QPushButton("Painel")
+            bt_painel.setMinimumWidth(120)
+            bt_painel.clicked.connect(self.painel_callback)
+            header.addWidget(bt_painel)
         root.addLayout(header)
 
         # Painel de botões de ação acima da tabela
@@ -323,147 +846,236 @@ class ListaOPsPage(QWidget):
             bt.setMinimumHeight(32)
             bt.setMaximumHeight(36)
             self.botoes_acoes.addWidget(bt)
+        self.bt_export.clicked.connect(self._exportar_varias)
         self.botoes_acoes.addStretch()
         root.addLayout(self.botoes_acoes)
 
-        self.tabela = QTableWidget()
-        self.tabela.setColumnCount(6)
-        self.tabela.setHorizontalHeaderLabels(["ID", "Cliente", "Nº OP", "Criada em", "Total Pares", "Ações"])
+        self.modelo = OPsTableModel(self)
+        # Enfileirada: o aviso (modal) não roda dentro de fetchMore/data da view
+        self.modelo.falhou.connect(self._falha_dados, Qt.QueuedConnection)
+        self.tabela = QTableView()
+        self.tabela.setModel(self.modelo)
         self.tabela.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabela.horizontalHeader().setSectionResizeMode(OPsTableModel.COL_ACOES, QHeaderView.Fixed)
+        self.tabela.setColumnWidth(OPsTableModel.COL_ACOES, 540)
+        self.tabela.verticalHeader().setDefaultSectionSize(40)
         self.tabela.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.tabela.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.tabela.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.tabela.cellDoubleClicked.connect(self._duplo_clique)
+        self.tabela.doubleClicked.connect(self._duplo_clique)
         self.tabela.verticalHeader().setVisible(False)
+        # Ordenação feita no banco (keyset), não pelo QTableView
+        cabecalho = self.tabela.horizontalHeader()
+        cabecalho.setSectionsClickable(True)
+        cabecalho.setSortIndicatorShown(True)
+        cabecalho.setSortIndicator(-1, Qt.DescendingOrder)
+        cabecalho.sortIndicatorChanged.connect(self._ordenar)
+
+        self.delegate_acoes = AcoesOPDelegate(self.tabela)
+        self.delegate_acoes.acionado.connect(self._acao)
+        self.tabela.setItemDelegateForColumn(OPsTableModel.COL_ACOES, self.delegate_acoes)
         root.addWidget(self.tabela)
 
     def atualizar(self):
-        filtro = self.busca.text().strip()
-        dados = listar_ops(filtro)
-        self.tabela.setRowCount(len(dados))
-        for r, (op_id, cliente, num_op, data_criacao, total_pares) in enumerate(dados):
-            self.tabela.setItem(r, 0, QTableWidgetItem(str(op_id)))
-            self.tabela.setItem(r, 1, QTableWidgetItem(cliente))
-            self.tabela.setItem(r, 2, QTableWidgetItem(str(num_op)))
-            self.tabela.setItem(r, 3, QTableWidgetItem(data_criacao))
-            self.tabela.setItem(r, 4, QTableWidgetItem(str(total_pares)))
-
-            acao_widget = QWidget()
-            lay = QHBoxLayout(acao_widget)
-            lay.setContentsMargins(0, 0, 0, 0)
-            lay.setSpacing(16)  # Espaço maior entre botões
-
-            bt_abrir = QPushButton("Abrir")
-            bt_abrir.setMinimumWidth(90)
-            bt_abrir.setMaximumWidth(90)
-            bt_abrir.setMinimumHeight(36)
-            bt_abrir.setMaximumHeight(36)
-            bt_abrir.setStyleSheet("""
-                QPushButton {
-                    background-color: #7c4dff;
-                    color: #fff;
-                    border-radius: 0px;
-                    font-weight: bold;
-                    font-size: 14px;
-                    padding: 0px;
-                    text-align: center;
-                }
-                QPushButton:hover { background-color: #6a3dff; }
-            """)
-
-            bt_export = QPushButton("Exportar CSV")
-            bt_export.setMinimumWidth(90)
-            bt_export.setMaximumWidth(90)
-            bt_export.setMinimumHeight(36)
-            bt_export.setMaximumHeight(36)
-            bt_export.setStyleSheet("""
-                QPushButton {
-                    background-color: #43d96b;
-                    color: #fff;
-                    border-radius: 0px;
-                    font-weight: bold;
-                    font-size: 14px;
-                    padding: 0px;
-                    text-align: center;
-                }
-                QPushButton:hover { background-color: #2fa74c; }
-            """)
-
-            bt_excluir = QPushButton("Excluir")
-            bt_excluir.setMinimumWidth(90)
-            bt_excluir.setMaximumWidth(90)
-            bt_excluir.setMinimumHeight(36)
-            bt_excluir.setMaximumHeight(36)
-            bt_excluir.setStyleSheet("""
-                QPushButton {
-                    background-color: #ff4d6d;
-                    color: #fff;
-                    border-radius: 0px;
-                    font-weight: bold;
-                    font-size: 14px;
-                    padding: 0px;
-                    text-align: center;
-                }
-                QPushButton:hover { background-color: #d93c5c; }
-            """)
-# ...restante do método...
-            bt_abrir.clicked.connect(lambda _, x=op_id: self.abrir_op_callback(x))
-            bt_excluir.clicked.connect(lambda _, x=op_id: self._excluir(x))
-            bt_export.clicked.connect(lambda _, x=op_id: self._exportar_csv(x))
-
-            lay.addWidget(bt_abrir)
-            lay.addWidget(bt_export)
-            lay.addWidget(bt_excluir)
-            acao_widget.setMinimumWidth(480)
-            self.tabela.setCellWidget(r, 5, acao_widget)
-
-        # Após preencher a tabela, ajuste o tamanho da coluna de ações:
-        self.tabela.setColumnWidth(5, 540)  # Aumente para 540 ou mais
-
-    def _duplo_clique(self, row, _col):
-        op_id = int(self.tabela.item(row, 0).text())
-        self.abrir_op_callback(op_id)
+        """Dispara a busca em segundo plano, cancelando a anterior se ainda rodar."""
+        self._timer_busca.stop()
+        if self._busca_em_andamento is not None:
+            self._busca_em_andamento.cancelar()
+        self._geracao_busca += 1
+        tarefa = BuscaOPsTarefa(
+            self._geracao_busca, self.busca.text().strip(), OPsTableModel.TAMANHO_PAGINA, self._sinais_busca,
+            self.modelo.ordem, self.modelo.decrescente,
+        )
+        self._busca_em_andamento = tarefa
+        QThreadPool.globalInstance().start(tarefa)
+
+    def _busca_concluida(self, geracao: int, filtro: str, linhas, progresso):
+        if geracao != self._geracao_busca:
+            return  # resultado de uma busca já superada
+        self._busca_em_andamento = None
+        self.modelo.aplicar(filtro, linhas, progresso)
+
+    def _busca_falhou(self, geracao: int, erro: str):
+        if geracao != self._geracao_busca:
+            return
+        self._busca_em_andamento = None
+        self._falha_dados(erro)
+
+    def _falha_dados(self, erro: str):
+        QMessageBox.warning(self, "Erro", f"Não foi possível carregar as OPs.\n\n{erro}")
+
+    def _ordenar(self, coluna: int, ordem):
+        if self.modelo.ordenar_por_coluna(coluna, ordem == Qt.DescendingOrder):
+            self.atualizar()
+
+    def _duplo_clique(self, index):
+        if index.column() == OPsTableModel.COL_ACOES:
+            return
+        self.abrir_op_callback(self.modelo.op_id(index.row()))
+
+    def _acao(self, op_id: int, acao: str):
+        if acao == "abrir":
+            self.abrir_op_callback(op_id)
+        elif acao == "exportar":
+            self._exportar_csv(op_id)
+        elif acao == "excluir":
+            self._excluir(op_id)
 
     def _excluir(self, op_id: int):
         r = QMessageBox.question(self, "Confirmar", f"Excluir OP {op_id}? Esta ação não pode ser desfeita.")
         if r != QMessageBox.Yes:
             return
-        conn = sqlite3.connect(DATABASE_PATH)
-        c = conn.cursor()
-        c.execute("DELETE FROM taloes WHERE op_id = ?", (op_id,))
-        c.execute("DELETE FROM ops WHERE id = ?", (op_id,))
-        conn.commit()
-        conn.close()
+        try:
+            fonte_dados.excluir_op(op_id)
+        except ERROS_FONTE as e:
+            QMessageBox.critical(self, "Erro", f"Não foi possível excluir a OP {op_id}.\n\n{e}")
+            return
+        self.op_excluida.emit(op_id)
         self.atualizar()
 
     def _exportar_csv(self, op_id: int):
         caminho, _ = QFileDialog.getSaveFileName(self, "Salvar CSV", f"op_{op_id}.csv", "CSV (*.csv)")
         if not caminho:
             return
-        # Exporta cabeçalho + todas as linhas de talões
-        conn = sqlite3.connect(DATABASE_PATH)
-        c = conn.cursor()
-        c.execute("SELECT cliente, num_op, data_criacao, total_pares FROM ops WHERE id = ?", (op_id,))
-        op = c.fetchone()
-        c.execute(
-            "SELECT giro, talao_num, numeracao, quantidade FROM taloes WHERE op_id = ? ORDER BY giro, talao_num, numeracao",
-            (op_id,),
+        exportar_em_segundo_plano(self, caminho, "CSV gerado com sucesso!", op_ids=[op_id], layout=LAYOUT_LONGO)
+
+    def _exportar_varias(self):
+        # Exporta as OPs selecionadas (ou todas) num único arquivo
+        op_ids = sorted({self.modelo.op_id(i.row()) for i in self.tabela.selectionModel().selectedRows()})
+        if not op_ids:
+            r = QMessageBox.question(self, "Exportar", "Nenhuma OP selecionada. Exportar todas as OPs?")
+            if r != QMessageBox.Yes:
+                return
+        rotulos = {
+            "Longo (giro, talão, tamanho, quantidade)": LAYOUT_LONGO,
+            "Largo (uma coluna por tamanho)": LAYOUT_LARGO,
+        }
+        rotulo, ok = QInputDialog.getItem(self, "Exportar CSV", "Layout:", list(rotulos), 0, False)
+        if not ok:
+            return
+        caminho, _ = QFileDialog.getSaveFileName(self, "Salvar CSV", "ops.csv", "CSV (*.csv)")
+        if not caminho:
+            return
+        exportar_em_segundo_plano(
+            self, caminho, "CSV gerado com sucesso! ({ops} OPs)", op_ids=op_ids or None, layout=rotulos[rotulo]
         )
-        linhas = c.fetchall()
-        conn.close()
-        with open(caminho, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(["OP ID", op_id])
-            if op:
-                w.writerow(["Cliente", op[0]])
-                w.writerow(["Nº OP", op[1]])
-                w.writerow(["Criada em", op[2]])
-                w.writerow(["Total Pares", op[3]])
-            w.writerow([])
-            w.writerow(["Giro", "Talão", "Tamanho", "Quantidade"]) 
-            for giro, talao, tam, qtd in linhas:
-                w.writerow([giro, talao, tam, qtd])
-        QMessageBox.information(self, "Exportar", "CSV gerado com sucesso!")
+
+
+    def _importar(self):
+        caminho, _ = QFileDialog.getOpenFileName(
+            self, "Importar pedidos", "", "Pedidos (*.csv *.jsonl *.ndjson);;Todos (*)"
+        )
+        if not caminho:
+            return
+        try:
+            analise = analisar_arquivo(caminho)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Não foi possível ler o arquivo.\n\n{e}")
+            return
+
+        # Relatório antes de gravar: inválidos e Nº de OP duplicados são ignorados
+        linhas = [f"{analise.validos} pedido(s) pronto(s) para importar."]
+        if analise.erros:
+            linhas.append(f"\n{len(analise.erros)} linha(s) inválida(s):")
+            linhas += [f"  linha {e.linha}: {e.mensagem}" for e in analise.erros[:10]]
+        if analise.duplicados:
+            linhas.append(f"\n{len(analise.duplicados)} Nº de OP duplicado(s) (no arquivo ou no banco):")
+            linhas += [
+                f"  Nº OP {num_op} (linhas {', '.join(map(str, ls))})"
+                for num_op, ls in sorted(analise.duplicados.items())[:10]
+            ]
+        if not analise.validos:
+            QMessageBox.warning(self, "Importar", "\n".join(linhas))
+            return
+        r = QMessageBox.question(self, "Importar", "\n".join(linhas) + "\n\nImportar agora?")
+        if r != QMessageBox.Yes:
+            return
+
+        def funcao(progresso):
+            return importar_arquivo(
+                caminho, analise, progresso=lambda feitas, total: progresso(feitas, total, f"{feitas}/{total} OPs")
+            )
+
+        def ao_concluir(resultado):
+            texto = f"{resultado.importadas} OP(s) importada(s)."
+            if resultado.interrompida:
+                texto += " Importação interrompida; as OPs já gravadas foram mantidas."
+            QMessageBox.information(self, "Importar", texto)
+            self.atualizar()
+
+        executar_com_progresso(self, "Importando OPs", funcao, ao_concluir)
+
+
+class PainelPage(QWidget):
+    """Totais de produção de todas as OPs (tabela ``rollups``, sem varrer talões)."""
+
+    CORTES = [
+        ("Clientes", "Cliente", "por_cliente"),
+        ("Tipos", "Tipo", "por_tipo"),
+        ("Tamanhos", "Tamanho", "por_tamanho"),
+        ("Dias", "Dia", "por_dia"),
+        ("Semanas", "Semana", "por_semana"),
+    ]
+
+    def __init__(self, voltar_callback=None):
+        super().__init__()
+        self.voltar_callback = voltar_callback
+        self.modelos: Dict[str, ResumoTableModel] = {}
+        self._setup_ui()
+        self.atualizar()
+
+    def _setup_ui(self):
+        root = QVBoxLayout(self)
+
+        header = QHBoxLayout()
+        title = QLabel("Painel de Produção")
+        title.setProperty("cls", "title")
+        header.addWidget(title)
+        header.addStretch()
+        bt_atualizar = QPushButton("Atualizar")
+        bt_atualizar.setMinimumWidth(120)
+        bt_atualizar.clicked.connect(self.atualizar)
+        header.addWidget(bt_atualizar)
+        bt_voltar = QPushButton("Voltar")
+        bt_voltar.setMinimumWidth(120)
+        bt_voltar.clicked.connect(self._voltar)
+        header.addWidget(bt_voltar)
+        root.addLayout(header)
+
+        self.lb_resumo = QLabel()
+        self.lb_resumo.setProperty("cls", "subtitle")
+        root.addWidget(self.lb_resumo)
+
+        abas = QTabWidget()
+        for titulo, rotulo, campo in self.CORTES:
+            modelo = ResumoTableModel(rotulo, self)
+            self.modelos[campo] = modelo
+            tabela = QTableView()
+            tabela.setModel(modelo)
+            tabela.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            tabela.verticalHeader().setVisible(False)
+            tabela.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            tabela.setSelectionBehavior(QAbstractItemView.SelectRows)
+            abas.addTab(tabela, titulo)
+        root.addWidget(abas)
+
+    def atualizar(self):
+        try:
+            painel = fonte_dados.painel_producao()
+        except ERROS_FONTE as e:
+            QMessageBox.warning(self, "Erro", f"Não foi possível carregar o painel.\n\n{e}")
+            return
+        for campo, modelo in self.modelos.items():
+            modelo.aplicar(getattr(painel, campo))
+        pendentes = painel.pares - painel.pares_ok
+        percentual = f" ({100 * painel.pares_ok / painel.pares:.1f}%)" if painel.pares else ""
+        self.lb_resumo.setText(
+            f"Total: {painel.pares} pares · OK: {painel.pares_ok}{percentual} · Pendentes: {pendentes}"
+        )
+
+    def _voltar(self):
+        if self.voltar_callback:
+            self.voltar_callback()
 
 
 class CriarOPPage(QWidget):
@@ -473,7 +1085,6 @@ class CriarOPPage(QWidget):
         self._setup_ui()
 
     def _setup_ui(self):
-        self.setStyleSheet(APP_QSS)
         root = QVBoxLayout(self)
 
         title = QLabel("Criar Nova OP")
@@ -491,7 +1102,7 @@ class CriarOPPage(QWidget):
         form_layout.addRow("Total de Pares:", self.total_pares_input)
 
         self.tipo_input = QComboBox()
-        self.tipo_input.addItems(["Masculino", "Feminino"])
+        self.tipo_input.addItems(TIPOS)
         form_layout.addRow("Tipo:", self.tipo_input)
 
         root.addWidget(form_group)
@@ -501,7 +1112,7 @@ class CriarOPPage(QWidget):
         salvar_btn.clicked.connect(self.salvar_op)
         limpar_btn = QPushButton("Limpar")
         limpar_btn.setProperty("secondary", True)
-        limpar_btn.clicked.connect(self._limpar)
+        limpar_btn.clicked.connect(self.limpar)
         botoes.addWidget(salvar_btn)
         botoes.addWidget(limpar_btn)
         botoes.addStretch()
@@ -513,7 +1124,7 @@ class CriarOPPage(QWidget):
         limpar_btn.setMinimumHeight(32)
         limpar_btn.setMaximumHeight(36)
 
-    def _limpar(self):
+    def limpar(self):
         self.cliente_input.clear()
         self.num_op_input.clear()
         self.total_pares_input.clear()
@@ -523,20 +1134,22 @@ class CriarOPPage(QWidget):
         num_op_txt = self.num_op_input.text().strip()
         total_txt = self.total_pares_input.text().strip()
 
-        if not cliente or not num_op_txt.isdigit() or not total_txt.isdigit():
+        if not cliente or not so_digitos(num_op_txt) or not so_digitos(total_txt):
             QMessageBox.warning(self, "Dados inválidos", "Preencha todos os campos corretamente.")
             return
 
         num_op = int(num_op_txt)
         total_pares = int(total_txt)
+        if num_op > NUM_OP_MAX or total_pares > NUM_OP_MAX:
+            QMessageBox.warning(self, "Dados inválidos", "Número grande demais.")
+            return
         if total_pares <= 0:
             QMessageBox.warning(self, "Dados inválidos", "Total de pares deve ser maior que zero.")
             return
 
         tipo = self.tipo_input.currentText()
         try:
-            op_id = inserir_op(cliente, num_op, total_pares, tipo)
-            gerar_taloes_iniciais(op_id, total_pares, tipo)
+            op_id = fonte_dados.criar_op(cliente, num_op, total_pares, tipo)
         except sqlite3.IntegrityError as e:
             QMessageBox.critical(self, "Erro", f"Não foi possível salvar. Nº OP já existente?\n\n{e}")
             return
@@ -553,11 +1166,27 @@ class VisualizarOPPage(QWidget):
         super().__init__()
         self.op_id = op_id
         self.voltar_callback = voltar_callback
+        # Fila das gravações de status: uma thread, na ordem dos cliques
+        self._pool_status = QThreadPool(self)
+        self._pool_status.setMaxThreadCount(1)
+        self._sinais_status = SinaisStatus(self)
+        self._sinais_status.gravado.connect(self._status_gravado)
+        self._sinais_status.falhou.connect(self._status_falhou)
+        self.modelos_por_giro: Dict[int, GiroTableModel] = {}
         self._setup_ui()
         self._carregar()
 
+    def abrir(self, op_id: int):
+        """Reaproveita a página para outra OP: recarrega os dados nos modelos existentes."""
+        self.op_id = op_id
+        self.lb_title.setText(f"OP {op_id}")
+        self._timer_validacao.stop()
+        self._carregar()
+
+    def tem_alteracoes(self) -> bool:
+        return any(modelo.alteradas for modelo in self.modelos_por_giro.values())
+
     def _setup_ui(self):
-        self.setStyleSheet(APP_QSS)
         self.layout = QVBoxLayout(self)
 
         header = QHBoxLayout()
@@ -595,7 +1224,12 @@ class VisualizarOPPage(QWidget):
         header.addWidget(self.bt_salvar)
         self.layout.addLayout(header)
 
+        # Abas por GIRO: criadas uma vez; a grade de cada uma é montada na
+        # primeira ativação e reaproveitada quando a página troca de OP
         self.abas = QTabWidget()
+        for giro in GIROS:
+            self.abas.addTab(QWidget(), f"Giro {giro}")
+        self.abas.currentChanged.connect(self._construir_aba)
         self.layout.addWidget(self.abas)
 
         # Rodapé totalizador
@@ -606,284 +1240,193 @@ class VisualizarOPPage(QWidget):
         rodape.addStretch()
         self.layout.addLayout(rodape)
 
+        # Validação contínua: reexecuta quando a edição pausa
+        self._timer_validacao = QTimer(self)
+        self._timer_validacao.setSingleShot(True)
+        self._timer_validacao.setInterval(300)
+        self._timer_validacao.timeout.connect(self._revalidar)
+
     def _carregar(self):
-        # Cabeçalho da OP
-        conn = sqlite3.connect(DATABASE_PATH)
-        c = conn.cursor()
-        c.execute("SELECT cliente, num_op, data_criacao, total_pares FROM ops WHERE id = ?", (self.op_id,))
-        row = c.fetchone()
-        conn.close()
-        if row:
-            cliente, num_op, data_criacao, total_pares = row
+        # Cabeçalho, talões e status (do cache de OPs quando a OP não mudou)
+        try:
+            op = fonte_dados.carregar_op_completa(self.op_id)
+        except ERROS_FONTE as e:
+            QMessageBox.warning(self, "Erro", f"Não foi possível carregar a OP {self.op_id}.\n\n{e}")
+            op = None
+        # Sem os dados da OP, salvar gravaria a grade vazia por cima dela
+        self.bt_salvar.setEnabled(op is not None)
+        self._total_pedido: Optional[int] = None
+        self._tipo: Optional[str] = None
+        if op:
+            cliente, num_op, data_criacao, total_pares, tipo = op.cabecalho
+            self._total_pedido, self._tipo = total_pares, tipo
             self.lb_title.setText(f"OP {self.op_id} · Cliente: {cliente} · Nº OP: {num_op} · Criada em: {data_criacao} · Total informado: {total_pares}")
-
-        # Montar tabelas por GIRO
-        self.abas.clear()
-        self.giros_data = carregar_taloes(self.op_id)
-        self.tabelas_por_giro: Dict[int, QTableWidget] = {}
-
-        for giro in GIROS:
-            taloes = self.giros_data.get(giro, {})
-            pagina = QWidget()
-            vbox = QVBoxLayout(pagina)
-            vbox.setContentsMargins(0, 0, 0, 0)  # Remover margens
-
-            headers = ["Talão", "Talão id", "Numeração"] + TAMANHOS + ["Qtd. Produto", "TOTAL TALÃO", "Status", "Ações"]
-            tabela = QTableWidget()
-            tabela.setColumnCount(len(headers))
-            tabela.setHorizontalHeaderLabels(headers)
-            tabela.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-            tabela.horizontalHeader().setSectionResizeMode(len(headers) - 1, QHeaderView.Fixed)
-            tabela.setColumnWidth(len(headers) - 1, 260)  # Largura maior para os botões
-            tabela.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-            tabela.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-            tabela.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-            tabela.setStyleSheet("QTableWidget { background: #000; selection-background-color: #7c4dff; }")
-            vbox.addWidget(tabela)
-            self.abas.addTab(pagina, f"Giro {giro}")
-            self.tabelas_por_giro[giro] = tabela
-
-            row_count = len(taloes) + 1
-            tabela.setRowCount(row_count)
-
-            total_por_tamanho = {num: 0 for num in TAMANHOS}
-
-            for r, (talao_num, tamanhos) in enumerate(taloes.items()):
-                tabela.setItem(r, 0, QTableWidgetItem(str(talao_num)))
-                tabela.setItem(r, 1, QTableWidgetItem(f"ID_{self.op_id}_{giro}_{talao_num}"))
-                tabela.setItem(r, 2, QTableWidgetItem("/".join([k for k, v in tamanhos.items() if v > 0])))
-
-                soma_linha = 0
-                for c, tam in enumerate(TAMANHOS, start=3):
-                    valor = int(tamanhos.get(tam, 0))
-                    item = QTableWidgetItem(str(valor))
-                    item.setTextAlignment(Qt.AlignCenter)
-                    item.setFlags(item.flags() | Qt.ItemIsEditable)
-                    tabela.setItem(r, c, item)
-                    soma_linha += valor
-                    total_por_tamanho[tam] += valor
-
-                tabela.setItem(r, len(TAMANHOS) + 3, QTableWidgetItem(str(soma_linha)))
-                total_item = QTableWidgetItem(str(soma_linha))
-                total_item.setTextAlignment(Qt.AlignCenter)
-                total_item.setFlags(Qt.ItemIsEnabled)
-                tabela.setItem(r, len(headers) - 1, total_item)
-
-                # Status
-                status_item = QTableWidgetItem("Pendente")
-                status_item.setBackground(Qt.red)
-                tabela.setItem(r, len(headers) - 2, status_item)
-                # Botão de ação (somente nas linhas de talão, não na linha TOTAL LOTE)
-                if r < len(taloes):  # Adiciona apenas nas linhas de talão
-                    acao_widget = QWidget()
-                    lay = QHBoxLayout(acao_widget)
-                    lay.setContentsMargins(0, 0, 0, 0)
-                    lay.setSpacing(8)
-                    lay.setAlignment(Qt.AlignVCenter)  # Centraliza verticalmente
-
-                    # Botão Pendente
-                    bt_pendente = QToolButton()
-                    bt_pendente.setText("Pendente")
-                    bt_pendente.setMinimumWidth(100)
-                    bt_pendente.setMaximumWidth(100)
-                    bt_pendente.setMinimumHeight(40)
-                    bt_pendente.setMaximumHeight(40)
-                    bt_pendente.setStyleSheet("""
-                        QToolButton {
-                            background-color: #ff4d6d;
-                            color: #fff;
-                            border-radius: 0px;
-                            font-weight: bold;
-                            font-size: 15px;
-                            padding: 0px;
-                            text-align: center;
-                        }
-                        QToolButton:pressed {
-                            background-color: #d93c5c;
-                        }
-                    """)
-
-                    # Botão OK
-                    bt_status = QToolButton()
-                    bt_status.setText("OK")
-                    bt_status.setMinimumWidth(100)
-                    bt_status.setMaximumWidth(100)
-                    bt_status.setMinimumHeight(40)
-                    bt_status.setMaximumHeight(40)
-                    bt_status.setStyleSheet("""
-                        QToolButton {
-                            background-color: #43d96b;
-                            color: #fff;
-                            border-radius: 0px;
-                            font-weight: bold;
-                            font-size: 15px;
-                            padding: 0px;
-                            text-align: center;
-                        }
-                        QToolButton:pressed {
-                            background-color: #2fa74c;
-                        }
-                    """)
-
-                    lay.addWidget(bt_pendente)
-                    lay.addWidget(bt_status)
-                    acao_widget.setMinimumHeight(40)
-                    acao_widget.setMaximumHeight(40)
-                    acao_widget.setMinimumWidth(200)
-                    acao_widget.setMaximumWidth(200)
-                    tabela.setCellWidget(r, len(headers) - 1, acao_widget)
-            tabela.setColumnWidth(len(headers) - 1, 200)  # Ajusta largura da coluna de ações
-        # ...restante do método...
-
-        self._atualizar_resumo()
-
-    def _on_cell_changed(self, row: int, col: int):
-        # Ignora se é a linha totalizadora ou a coluna não editável
-        tabela: QTableWidget = self.abas.currentWidget().layout().itemAt(0).widget()  # tabela da aba atual
-        last_row = tabela.rowCount() - 1
-        if row == last_row or col == 0 or col == tabela.columnCount() - 1:
+            self.giros_data, self.status_taloes = op.giros, op.status
+        else:
+            self.lb_title.setText(f"OP {self.op_id} · indisponível")
+            self.giros_data = TaloesGiro.de_linhas([])
+            self.status_taloes = {}
+        self._total_op = sum(dados.total() for dados in self.giros_data.values())
+
+        self.violacoes = []
+        for giro, modelo in self.modelos_por_giro.items():
+            modelo.recarregar(self.op_id, self.giros_data[giro], self._status_do_giro(giro))
+        self._construir_aba(self.abas.currentIndex())
+
+        self._revalidar()
+
+    def _construir_aba(self, index: int):
+        if index < 0 or GIROS[index] in self.modelos_por_giro:
             return
-
-        # Atualiza TOTAL da linha
-        soma = 0
-        for c in range(1, tabela.columnCount() - 1):
-            try:
-                soma += int(tabela.item(row, c).text())
-            except Exception:
-                pass
-        total_item = QTableWidgetItem(str(soma))
-        total_item.setTextAlignment(Qt.AlignCenter)
-        total_item.setFlags(Qt.ItemIsEnabled)
-        tabela.setItem(row, tabela.columnCount() - 1, total_item)
-
-        # Recalcula total por coluna
-        self._recalcular_totais_da_tabela(tabela)
+        giro = GIROS[index]
+        pagina = self.abas.widget(index)
+        vbox = QVBoxLayout(pagina)
+        vbox.setContentsMargins(0, 0, 0, 0)  # Remover margens
+
+        modelo = GiroTableModel(self.op_id, giro, self.giros_data[giro], self._status_do_giro(giro), self)
+        modelo.total_alterado.connect(self._on_total_alterado)
+        self.modelos_por_giro[giro] = modelo
+        self._destacar_violacoes(giro)
+
+        tabela = QTableView()
+        tabela.setModel(modelo)
+        tabela.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        tabela.horizontalHeader().setSectionResizeMode(GiroTableModel.COL_ACOES, QHeaderView.Fixed)
+        tabela.setColumnWidth(GiroTableModel.COL_ACOES, 220)  # Largura para os botões
+        tabela.verticalHeader().setDefaultSectionSize(44)
+        tabela.verticalHeader().setVisible(False)
+        tabela.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        tabela.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        tabela.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        tabela.setStyleSheet("QTableView { background: #000; selection-background-color: #7c4dff; }")
+
+        # Edição das quantidades com QSpinBox; ações pintadas pelo delegate
+        delegate_qtd = SpinBoxDelegate(tabela)
+        for c in range(GiroTableModel.COL_PRIMEIRO_TAMANHO, GiroTableModel.COL_QTD_PRODUTO):
+            tabela.setItemDelegateForColumn(c, delegate_qtd)
+        delegate_acoes = AcoesTalaoDelegate(tabela)
+        delegate_acoes.acionado.connect(lambda talao_num, acao, g=giro: self._acao_talao(g, talao_num, acao))
+        tabela.setItemDelegateForColumn(GiroTableModel.COL_ACOES, delegate_acoes)
+        vbox.addWidget(tabela)
+
+    def _status_do_giro(self, giro: int) -> Dict[int, StatusTalao]:
+        return {t: v for (g, t), v in self.status_taloes.items() if g == giro}
+
+    def _on_total_alterado(self, _giro: int, delta: int):
+        self._total_op += delta
+        self._atualizar_resumo()
+        self._timer_validacao.start()
+
+    def _dados_atuais(self) -> Dict[int, TaloesGiro]:
+        """Dados em edição: modelo das abas montadas, dados carregados nas demais."""
+        return {
+            giro: (self.modelos_por_giro[giro].dados if giro in self.modelos_por_giro else self.giros_data[giro])
+            for giro in GIROS
+        }
+
+    def _revalidar(self):
+        # Roda quando a edição pausa (timer), sobre os dados e não sobre a grade
+        self.violacoes = validar_op(self._dados_atuais(), self._total_pedido, self._tipo)
+        for giro in self.modelos_por_giro:
+            self._destacar_violacoes(giro)
         self._atualizar_resumo()
 
-    def _recalcular_totais_da_tabela(self, tabela: QTableWidget):
-        last_row = tabela.rowCount() - 1
-        # zera
-        for c in range(1, tabela.columnCount() - 1):
-            tabela.setItem(last_row, c, QTableWidgetItem("0"))
-            tabela.item(last_row, c).setFlags(Qt.ItemIsEnabled)
-            tabela.item(last_row, c).setTextAlignment(Qt.AlignCenter)
-        # soma
-        for r in range(0, last_row):
-            for c in range(1, tabela.columnCount() - 1):
-                try:
-                    val = int(tabela.item(r, c).text())
-                except Exception:
-                    val = 0
-                cur = int(tabela.item(last_row, c).text())
-                tabela.item(last_row, c).setText(str(cur + val))
-        # total geral
-        soma_geral = 0
-        for c in range(1, tabela.columnCount() - 1):
-            soma_geral += int(tabela.item(last_row, c).text())
-        total_item = QTableWidgetItem(str(soma_geral))
-        total_item.setFlags(Qt.ItemIsEnabled)
-        total_item.setTextAlignment(Qt.AlignCenter)
-        tabela.setItem(last_row, tabela.columnCount() - 1, total_item)
+    def _destacar_violacoes(self, giro: int):
+        taloes = {v.talao_num for v in self.violacoes if v.giro == giro and v.regra == SOMA_TALAO}
+        celulas = {
+            (v.talao_num, v.tamanho) for v in self.violacoes if v.giro == giro and v.regra == FORA_DA_GRADE
+        }
+        self.modelos_por_giro[giro].marcar_violacoes(taloes, celulas)
+
+    @staticmethod
+    def _listar(violacoes) -> str:
+        linhas = [v.mensagem for v in violacoes[:10]]
+        if len(violacoes) > 10:
+            linhas.append(f"… e mais {len(violacoes) - 10} problema(s).")
+        return "\n".join(linhas)
 
     def _validar(self) -> bool:
-        # Cada talão deve somar exatamente PARES_POR_TALAO
-        for giro, tabela in self.tabelas_por_giro.items():
-            last_row = tabela.rowCount() - 1
-            for r in range(0, last_row):
-                soma = 0
-                for c in range(1, tabela.columnCount() - 1):
-                    try:
-                        soma += int(tabela.item(r, c).text())
-                    except Exception:
-                        pass
-                if soma != PARES_POR_TALAO:
-                    QMessageBox.warning(
-                        self,
-                        "Validação",
-                        f"No Giro {giro}, Talão {tabela.item(r,0).text()} soma {soma}.\nCada talão deve somar {PARES_POR_TALAO} pares.",
-                    )
-                    return False
-        return True
+        # Só a soma dos talões impede salvar; total e grade ficam como avisos
+        self._timer_validacao.stop()
+        self._revalidar()
+        bloqueantes = [v for v in self.violacoes if v.bloqueia]
+        if not bloqueantes:
+            return True
+        QMessageBox.warning(self, "Validação", self._listar(bloqueantes))
+        return False
 
     def _salvar(self):
         if not self._validar():
             return
-        # Coleta dados editados
-        for giro, tabela in self.tabelas_por_giro.items():
-            last_row = tabela.rowCount() - 1
-            for r in range(0, last_row):
-                talao_num = int(tabela.item(r, 0).text())
-                for c, tam in enumerate(TAMANHOS, start=1):
-                    try:
-                        val = int(tabela.item(r, c).text())
-                    except Exception:
-                        val = 0
-                    self.giros_data[giro][talao_num][tam] = val
+        # Só as células que mudaram vão para o banco
+        alteracoes = {
+            (giro, talao_num, tam): qtd
+            for giro, modelo in self.modelos_por_giro.items()
+            for (talao_num, tam), qtd in modelo.alteradas.items()
+        }
         try:
-            salvar_taloes(self.op_id, self.giros_data)
+            fonte_dados.salvar_taloes(self.op_id, alteracoes)
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Falha ao salvar alterações.\n\n{e}")
             return
-        QMessageBox.information(self, "Salvo", "Alterações gravadas com sucesso.")
+        for giro, modelo in self.modelos_por_giro.items():
+            self.giros_data[giro] = modelo.dados.copia()
+            modelo.marcar_salvo()
+        avisos = [v for v in self.violacoes if not v.bloqueia]
+        if avisos:
+            QMessageBox.information(
+                self, "Salvo", "Alterações gravadas, com avisos:\n\n" + self._listar(avisos)
+            )
+        else:
+            QMessageBox.information(self, "Salvo", "Alterações gravadas com sucesso.")
         self._atualizar_resumo()
 
     def _exportar_csv(self):
         caminho, _ = QFileDialog.getSaveFileName(self, "Salvar CSV da OP", f"op_{self.op_id}.csv", "CSV (*.csv)")
         if not caminho:
             return
-        # Cabeçalho
-        conn = sqlite3.connect(DATABASE_PATH)
-        c = conn.cursor()
-        c.execute("SELECT cliente, num_op, data_criacao, total_pares FROM ops WHERE id = ?", (self.op_id,))
-        op = c.fetchone()
-        c.execute(
-            "SELECT giro, talao_num, numeracao, quantidade FROM taloes WHERE op_id = ? ORDER BY giro, talao_num, numeracao",
-            (self.op_id,),
+        exportar_em_segundo_plano(
+            self, caminho, "CSV da OP gerado com sucesso!", op_ids=[self.op_id], layout=LAYOUT_LARGO
         )
-        linhas = c.fetchall()
-        conn.close()
-        with open(caminho, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(["OP ID", self.op_id])
-            if op:
-                w.writerow(["Cliente", op[0]])
-                w.writerow(["Nº OP", op[1]])
-                w.writerow(["Criada em", op[2]])
-                w.writerow(["Total Pares (pedido)", op[3]])
-            w.writerow([])
-            w.writerow(["Giro", "Talão"] + TAMANHOS + ["TOTAL TALÃO"]) 
-
-            # Gera por giro/talão conforme tela (já valida somas)
-            for giro in GIROS:
-                taloes = self.giros_data.get(giro, {})
-                for talao_num, tamanhos in taloes.items():
-                    row = [giro, talao_num]
-                    soma = 0
-                    for tam in TAMANHOS:
-                        qtd = int(tamanhos.get(tam, 0))
-                        row.append(qtd)
-                        soma += qtd
-                    row.append(soma)
-                    w.writerow(row)
-        QMessageBox.information(self, "Exportar", "CSV da OP gerado com sucesso!")
 
     def _atualizar_resumo(self):
-        total_geral = 0
-        for tabela in self.tabelas_por_giro.values():
-            last_row = tabela.rowCount() - 1
-            try:
-                total_geral += int(tabela.item(last_row, tabela.columnCount() - 1).text())
-            except Exception:
-                pass
-        self.lb_resumo.setText(f"Total geral (somando todos os GIROS): {total_geral} pares")
-
-    def _excluir_talao(self, talao_num, giro):
-        # Implemente a lógica de exclusão do talão específico do giro
-        pass
-
-    def _alternar_status(self, row, giro):
-        # Implemente a lógica de alternar status do talão específico do giro
-        pass
+        # Total mantido pelos modelos (diferença a cada edição), sem varrer widgets
+        texto = f"Total geral (somando todos os GIROS): {self._total_op} pares"
+        bloqueantes = sum(1 for v in self.violacoes if v.bloqueia)
+        if bloqueantes:
+            texto += f" · {bloqueantes} problema(s) de validação"
+        if len(self.violacoes) > bloqueantes:
+            texto += f" · {len(self.violacoes) - bloqueantes} aviso(s)"
+        self.lb_resumo.setText(texto)
+
+    def _acao_talao(self, giro: int, talao_num: int, acao: str):
+        # Botões Pendente/OK da coluna Ações (a ação é o próprio status)
+        self._alternar_status(giro, talao_num, acao)
+
+    def _alternar_status(self, giro: int, talao_num: int, status: str):
+        # Otimista: a grade muda na hora e a gravação (um UPSERT) vai para a
+        # fila de status, que grava um clique por vez, na ordem dos cliques
+        anterior = self.modelos_por_giro[giro].definir_status(talao_num, status)
+        if anterior is None:
+            return
+        self.status_taloes[(giro, talao_num)] = (status, None)
+        self._pool_status.start(
+            GravarStatusTarefa(self._sinais_status, self.op_id, giro, talao_num, status, anterior)
+        )
+
+    def _status_gravado(self, op_id: int, giro: int, talao_num: int, status: str, momento: str):
+        if op_id != self.op_id:
+            return  # a página já foi reaproveitada para outra OP
+        if self.status_taloes.get((giro, talao_num), (None, None))[0] != status:
+            return  # já houve outro clique depois deste
+        self.status_taloes[(giro, talao_num)] = (status, momento)
+        self.modelos_por_giro[giro].definir_status(talao_num, status, momento)
+
+    def _status_falhou(self, op_id: int, giro: int, talao_num: int, status: str, anterior, erro: str):
+        if op_id == self.op_id and self.status_taloes.get((giro, talao_num), (None, None))[0] == status:
+            self.status_taloes[(giro, talao_num)] = anterior
+            self.modelos_por_giro[giro].definir_status(talao_num, *anterior)
+        QMessageBox.warning(self, "Status", f"Não foi possível gravar o status do talão {talao_num}.\n\n{erro}")
 
     def _voltar(self):
         if self.voltar_callback:
@@ -895,6 +1438,16 @@ class VisualizarOPPage(QWidget):
 # ================
 
 class MainWindow(QMainWindow):
+    """Pilha de telas. As telas são reaproveitadas em vez de recriadas:
+
+    - uma CriarOPPage, limpa a cada "Nova OP";
+    - até MAX_PAGINAS_OP telas de OP, mantidas em LRU por op_id. Reabrir uma
+      OP recente só troca a tela visível; abrir outra reaproveita a tela
+      menos recente (recarregando os dados nos modelos que ela já tem).
+    """
+
+    MAX_PAGINAS_OP = 4
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("OP de Calçados · Profissional")
@@ -903,15 +1456,24 @@ class MainWindow(QMainWindow):
         self.stack.setContentsMargins(0, 0, 0, 0)  # Remove margens do stack
         self.setCentralWidget(self.stack)
 
-        self.page_lista = ListaOPsPage(self.abrir_op, self.nova_op)
+        self.page_lista = ListaOPsPage(self.abrir_op, self.nova_op, self.abrir_painel)
+        self.page_lista.op_excluida.connect(self._op_excluida)
         self.stack.addWidget(self.page_lista)
+        self.page_painel: Optional[PainelPage] = None
+        self.page_criar: Optional[CriarOPPage] = None
+        # op_id -> tela, da menos para a mais recente; livres: telas de OPs excluídas
+        self._paginas_op: "OrderedDict[int, VisualizarOPPage]" = OrderedDict()
+        self._paginas_livres: List[VisualizarOPPage] = []
 
         # Status bar
         self.statusBar().showMessage("Pronto")
 
     def nova_op(self):
-        self.page_criar = CriarOPPage(self._on_op_criada)
-        self.stack.addWidget(self.page_criar)
+        if self.page_criar is None:
+            self.page_criar = CriarOPPage(self._on_op_criada)
+            self.stack.addWidget(self.page_criar)
+        else:
+            self.page_criar.limpar()
         self.stack.setCurrentWidget(self.page_criar)
 
     def _on_op_criada(self, op_id: int):
@@ -921,32 +1483,64 @@ class MainWindow(QMainWindow):
         self.page_lista.atualizar()
 
     def abrir_op(self, op_id: int):
-        self.page_visualizar = VisualizarOPPage(op_id, voltar_callback=self._voltar_lista)
-        self.stack.addWidget(self.page_visualizar)
-        self.stack.setCurrentWidget(self.page_visualizar)
+        pagina = self._paginas_op.pop(op_id, None)
+        if pagina is None:
+            pagina = self._pagina_para_reusar()
+            if pagina is False:
+                return  # usuário preferiu não descartar alterações
+            if pagina is None:
+                pagina = VisualizarOPPage(op_id, voltar_callback=self._voltar_lista)
+                self.stack.addWidget(pagina)
+            else:
+                pagina.abrir(op_id)
+        elif fonte_dados is not banco and not pagina.tem_alteracoes():
+            # Com servidor, outra estação pode ter mudado a OP desde a última visita
+            pagina.abrir(op_id)
+        self._paginas_op[op_id] = pagina
+        self.stack.setCurrentWidget(pagina)
+
+    def _pagina_para_reusar(self):
+        """Tela a reaproveitar; None se ainda cabe uma nova, False se o usuário cancelou."""
+        if self._paginas_livres:
+            return self._paginas_livres.pop()
+        if len(self._paginas_op) < self.MAX_PAGINAS_OP:
+            return None
+        # A menos recente sem alterações pendentes; se todas têm, pergunta pela menos recente
+        op_id = next((k for k, p in self._paginas_op.items() if not p.tem_alteracoes()), None)
+        if op_id is None:
+            op_id = next(iter(self._paginas_op))
+            r = QMessageBox.question(
+                self, "Alterações não salvas",
+                f"A OP {op_id} tem alterações não salvas. Descartá-las para abrir outra OP?",
+            )
+            if r != QMessageBox.Yes:
+                return False
+        return self._paginas_op.pop(op_id)
+
+    def _op_excluida(self, op_id: int):
+        pagina = self._paginas_op.pop(op_id, None)
+        if pagina is not None:
+            self._paginas_livres.append(pagina)
+
+    def abrir_painel(self):
+        # Uma só instância: reabrir só relê os rollups
+        if self.page_painel is None:
+            self.page_painel = PainelPage(voltar_callback=self._voltar_lista)
+            self.stack.addWidget(self.page_painel)
+        else:
+            self.page_painel.atualizar()
+        self.stack.setCurrentWidget(self.page_painel)
 
     def _voltar_lista(self):
         self.stack.setCurrentWidget(self.page_lista)
         self.page_lista.atualizar()
 
 
-# =====
-# Main
-# =====
-
-def main():
-    criar_banco()
-    app = QApplication(sys.argv)
-    app.setStyleSheet(APP_QSS)
-    win = MainWindow()
-    win.showMaximized()
-    sys.exit(app.exec_())
-
-
-if __name__ == "__main__":
-    main()
-
 def anexar_arquivo(caminho_arquivo):
+    # Importado só aqui: o pyautogui carrega captura de tela/X11 e atrasaria
+    # (ou quebraria, em máquinas sem tela) a abertura do app
+    import pyautogui
+
     # Aguarde o WhatsApp Web carregar a conversa
     time.sleep(2)
     # Clique no ícone de clipe (ajuste as coordenadas conforme seu monitor)
@@ -963,3 +1557,60 @@ def anexar_arquivo(caminho_arquivo):
     # Clique no botão de enviar (ícone de avião de papel)
     pyautogui.click(x=1250, y=950)  # Troque x e y pelas coordenadas do botão de enviar
     time.sleep(2)
+
+# =====
+# Main
+# =====
+
+ORCAMENTO_INICIO_S = 1.0  # import + primeira pintura da janela
+
+
+class MedidorInicio(QObject):
+    """Filtro de eventos do --medir-inicio: anota o primeiro paint e fecha o app."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tempo: Optional[float] = None
+
+    def eventFilter(self, obj, event):
+        if self.tempo is None and event.type() == QEvent.Paint:
+            self.tempo = time.perf_counter() - _INICIO
+            QTimer.singleShot(0, QApplication.instance().quit)
+        return False
+
+
+def main():
+    # python ops.py --medir-inicio: mede o tempo até a primeira pintura e sai
+    # com erro se passar de ORCAMENTO_INICIO_S (benchmark de abertura)
+    medir = "--medir-inicio" in sys.argv
+    # python ops.py --servidor http://maquina:8765 [--token X]: usa o banco servido por servidor.py
+    global fonte_dados, ERROS_FONTE
+    if "--servidor" in sys.argv[:-1]:
+        from servidor import VARIAVEL_TOKEN, ClienteAPI, ErroRequisicao
+
+        ERROS_FONTE = (sqlite3.Error, ErroRequisicao)
+
+        token = os.environ.get(VARIAVEL_TOKEN)
+        if "--token" in sys.argv[:-1]:
+            token = sys.argv[sys.argv.index("--token") + 1]
+        fonte_dados = ClienteAPI(sys.argv[sys.argv.index("--servidor") + 1], token)
+    else:
+        criar_banco()
+    app = QApplication(sys.argv)
+    app.setStyleSheet(APP_QSS)  # único ponto de estilo global; as telas não reaplicam
+    medidor = MedidorInicio(app)
+    if medir:
+        app.installEventFilter(medidor)
+    win = MainWindow()
+    win.showMaximized()
+    codigo = app.exec_()
+    fechar_conexoes()
+    if medir:
+        tempo = medidor.tempo if medidor.tempo is not None else float("inf")
+        print(f"Abertura até a primeira pintura: {tempo * 1000:.0f} ms (orçamento {ORCAMENTO_INICIO_S * 1000:.0f} ms)")
+        codigo = 0 if tempo <= ORCAMENTO_INICIO_S else 1
+    sys.exit(codigo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+"""
+Servidor HTTP/JSON das OPs (modo multi-estação)
+-----------------------------------------------
+Um único processo abre o banco e atende as estações (corte, costura,
+expedição) pela rede local, em vez de cada uma abrir o arquivo SQLite numa
+pasta compartilhada. Só stdlib (``http.server``): cada requisição roda numa
+thread; as gravações passam todas pela única conexão de escrita do
+``banco.gerenciador()`` (um só escritor, sem disputa de lock entre máquinas)
+e a lista/busca usa o pool somente-leitura, em paralelo. O cache de OPs
+(``banco.cache_ops``) fica no servidor e vale para todas as estações.
+
+Rotas (JSON; erros vêm como ``{"erro": "..."}``):
+
+    GET    /ops?filtro=&limite=&deslocamento=&ordem=&desc=1&apos=[valor,id]   lista/busca
+    GET    /ops/progresso?ids=1,2,3                                           pares e pares OK
+    POST   /ops              {cliente, num_op, total_pares, tipo}             cria (409 se o Nº existe)
+    GET    /ops/<id>                                                          cabeçalho, talões e status
+    DELETE /ops/<id>
+    PUT    /ops/<id>/taloes  {"alteracoes": [[giro, talao, tamanho, qtd], ...]}
+    PUT    /ops/<id>/status  {giro, talao, status}
+    GET    /painel
+    GET    /exportar?ops=1,2&de=&ate=&layout=                                 CSV
+
+Uso:  python servidor.py [--banco producao_calcados.db] [--host 127.0.0.1] [--porta 8765] [--token SEGREDO]
+      python ops.py --servidor http://maquina:8765 [--token SEGREDO]    (interface usando o servidor)
+
+Por padrão só atende esta máquina (127.0.0.1). Para servir a rede é preciso
+dizer a interface (``--host 0.0.0.0``) e um token compartilhado (``--token``
+ou a variável ``OPS_TOKEN``), que as estações mandam em ``Authorization:
+Bearer``; sem ele, qualquer máquina da rede poderia apagar OPs.
+
+``ClienteAPI`` é o lado da interface: tem as mesmas funções de ``banco`` que
+as telas usam, devolvendo os mesmos tipos.
+"""
+
+import argparse
+import hmac
+import ipaddress
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from array import array
+from datetime import date
+from http.client import HTTPException
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlencode, urlsplit
+from urllib.request import Request, urlopen
+
+import banco
+from banco import (
+    OPCarregada, Painel, TaloesGiro, Celula, criar_banco, fechar_conexoes, gerenciador, consultar_ops,
+)
+
+PORTA_PADRAO = 8765
+HOST_PADRAO = "127.0.0.1"
+VARIAVEL_TOKEN = "OPS_TOKEN"
+TIMEOUT_CLIENTE_S = 15
+BLOCO_DOWNLOAD = 64 * 1024
+SEM_RESPOSTA = 0  # ErroRequisicao.codigo quando o servidor não respondeu (rede, timeout)
+# Falhas de transporte: conexão recusada/derrubada, timeout (URLError e socket.timeout
+# são OSError) e resposta truncada/malformada (HTTPException)
+_ERROS_DE_REDE = (OSError, HTTPException)
+
+_ROTA_OP = re.compile(r"^/ops/(\d+)(?:/(taloes|status))?$")
+
+
+class ErroRequisicao(RuntimeError):
+    """Resposta de erro (4xx/5xx) com ``{"erro": mensagem}``; a ``ClienteAPI`` a recria do lado da interface."""
+
+    def __init__(self, codigo: int, mensagem: str):
+        super().__init__(mensagem)
+        self.codigo = codigo
+
+# ================
+# Lado do servidor
+# ================
+
+QTD_MAX = 0xFFFF  # TaloesGiro guarda as quantidades em array('H')
+
+
+def _inteiro(valor, campo: str, minimo: int, maximo: int) -> int:
+    """Inteiro JSON (ou texto de dígitos) em [minimo, maximo]; senão 400."""
+    if isinstance(valor, str) and banco.so_digitos(valor):
+        valor = int(valor)
+    if isinstance(valor, bool) or not isinstance(valor, int) or not minimo <= valor <= maximo:
+        raise ErroRequisicao(400, f"Valor inválido para {campo}: {valor!r} (de {minimo} a {maximo})")
+    return valor
+
+
+def _data(texto: Optional[str], campo: str) -> Optional[str]:
+    if not texto:
+        return None
+    try:
+        return date.fromisoformat(texto).isoformat()
+    except ValueError:
+        raise ErroRequisicao(400, f"{campo} inválida (use AAAA-MM-DD): {texto}")
+
+
+def _op_existente(op_id: int) -> OPCarregada:
+    op = banco.carregar_op_completa(op_id)
+    if op is None:
+        raise ErroRequisicao(404, f"OP {op_id} não existe")
+    return op
+
+
+def _talao(op: OPCarregada, op_id: int, giro, talao) -> Tuple[int, int]:
+    """(giro, talão) de um talão que existe na OP; senão 400."""
+    giro = _inteiro(giro, "giro", min(banco.GIROS), max(banco.GIROS))
+    talao = _inteiro(talao, "talão", 1, QTD_MAX)
+    dados = op.giros.get(giro)
+    if dados is None or talao not in dados.taloes:
+        raise ErroRequisicao(400, f"OP {op_id} não tem o talão {talao} no giro {giro}")
+    return giro, talao
+
+
+def _inteiros(texto: str) -> List[int]:
+    try:
+        return [int(v) for v in texto.split(",") if v.strip()]
+    except ValueError:
+        raise ErroRequisicao(400, f"IDs inválidos: {texto}")
+
+
+def _op_json(op: OPCarregada) -> Dict:
+    return {
+        "cabecalho": list(op.cabecalho),
+        "giros": {str(g): {"taloes": d.taloes.tolist(), "qtd": d.qtd.tolist()} for g, d in op.giros.items()},
+        "status": [[g, t, status, momento] for (g, t), (status, momento) in op.status.items()],
+    }
+
+
+class ManipuladorOPs(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # conexões persistentes entre as requisições de uma estação
+    server_version = "ServidorOPs/1"
+
+    # ---- respostas ----
+    def _responder(self, codigo: int, corpo: Dict) -> None:
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _corpo(self) -> Dict:
+        if not self._dados:
+            return {}
+        try:
+            return json.loads(self._dados)
+        except ValueError:
+            raise ErroRequisicao(400, "JSON inválido")
+
+    def _autorizado(self) -> bool:
+        token = self.server.token
+        if token is None:
+            return True
+        recebido = self.headers.get("Authorization", "")
+        return hmac.compare_digest(recebido.encode("utf-8"), f"Bearer {token}".encode("utf-8"))
+
+    def _atender(self, metodo: str) -> None:
+        # Lê o corpo antes de rotear: a conexão persistente fica limpa mesmo se a rota falhar
+        self._dados = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        url = urlsplit(self.path)
+        consulta = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if not self._autorizado():
+                raise ErroRequisicao(401, "Token ausente ou inválido")
+            self._rotear(metodo, url.path.rstrip("/") or "/", consulta)
+        except ErroRequisicao as e:
+            self._responder(e.codigo, {"erro": str(e)})
+        except sqlite3.IntegrityError as e:
+            self._responder(409, {"erro": str(e)})
+        except (KeyError, TypeError, ValueError) as e:
+            self._responder(400, {"erro": f"Requisição inválida: {e}"})
+        except Exception as e:
+            self.log_error("falha em %s %s: %r", metodo, self.path, e)
+            self._responder(500, {"erro": str(e)})
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def do_PUT(self):
+        self._atender("PUT")
+
+    def do_DELETE(self):
+        self._atender("DELETE")
+
+    # ---- rotas ----
+    def _rotear(self, metodo: str, caminho: str, consulta: Dict[str, str]) -> None:
+        if caminho == "/ops" and metodo == "GET":
+            apos = json.loads(consulta["apos"]) if consulta.get("apos") else None
+            with gerenciador().leitura() as c:
+                linhas = consultar_ops(
+                    c,
+                    consulta.get("filtro", ""),
+                    int(consulta["limite"]) if consulta.get("limite") else None,
+                    int(consulta.get("deslocamento", 0)),
+                    consulta.get("ordem") or None,
+                    consulta.get("desc", "1") == "1",
+                    apos,
+                )
+            return self._responder(200, {"ops": [list(linha) for linha in linhas]})
+        if caminho == "/ops" and metodo == "POST":
+            corpo = self._corpo()
+            cliente = str(corpo["cliente"]).strip()
+            if not cliente:
+                raise ErroRequisicao(400, "cliente vazio")
+            if corpo["tipo"] not in banco.TIPOS:
+                raise ErroRequisicao(400, f"tipo inválido: {corpo['tipo']!r} (use {', '.join(banco.TIPOS)})")
+            op_id = banco.criar_op(
+                cliente,
+                _inteiro(corpo["num_op"], "num_op", 1, banco.NUM_OP_MAX),
+                _inteiro(corpo["total_pares"], "total_pares", 1, banco.NUM_OP_MAX),
+                corpo["tipo"],
+            )
+            return self._responder(201, {"id": op_id})
+        if caminho == "/ops/progresso" and metodo == "GET":
+            progresso = banco.progresso_ops(_inteiros(consulta.get("ids", "")))
+            return self._responder(200, {"progresso": {str(k): list(v) for k, v in progresso.items()}})
+        if caminho == "/painel" and metodo == "GET":
+            return self._responder(200, banco.painel_producao()._asdict())
+        if caminho == "/exportar" and metodo == "GET":
+            return self._exportar(consulta)
+
+        rota = _ROTA_OP.match(caminho)
+        if rota is None:
+            raise ErroRequisicao(404, f"Rota inexistente: {metodo} {caminho}")
+        op_id, recurso = int(rota.group(1)), rota.group(2)
+        if recurso is None and metodo == "GET":
+            return self._responder(200, _op_json(_op_existente(op_id)))
+        if recurso is None and metodo == "DELETE":
+            banco.excluir_op(op_id)
+            return self._responder(200, {})
+        if recurso == "taloes" and metodo == "PUT":
+            return self._responder(200, {"gravadas": banco.salvar_taloes(op_id, self._alteracoes(op_id))})
+        if recurso == "status" and metodo == "PUT":
+            corpo = self._corpo()
+            status = corpo["status"]
+            if status not in (banco.STATUS_PENDENTE, banco.STATUS_OK):
+                raise ErroRequisicao(400, f"Status inválido: {status}")
+            giro, talao = _talao(_op_existente(op_id), op_id, corpo["giro"], corpo["talao"])
+            momento = banco.definir_status_talao(op_id, giro, talao, status)
+            return self._responder(200, {"momento": momento})
+        raise ErroRequisicao(405, f"Método {metodo} não aceito em {caminho}")
+
+    def _alteracoes(self, op_id: int) -> Dict[Celula, int]:
+        """Células do PUT de talões, conferidas contra a OP.
+
+        Mesma regra do editor local: talões existentes e qualquer tamanho de
+        TAMANHOS (fora da grade do tipo é só aviso da validação, não bloqueia).
+        """
+        op = _op_existente(op_id)
+        alteracoes: Dict[Celula, int] = {}
+        for g, t, tam, qtd in self._corpo()["alteracoes"]:
+            giro, talao = _talao(op, op_id, g, t)
+            if tam not in banco.INDICE_TAMANHO:
+                raise ErroRequisicao(400, f"Tamanho desconhecido: {tam!r}")
+            alteracoes[(giro, talao, tam)] = _inteiro(qtd, "quantidade", 0, QTD_MAX)
+        return alteracoes
+
+    def _exportar(self, consulta: Dict[str, str]) -> None:
+        from exportacao import LAYOUT_LONGO, exportar_csv
+
+        fd, temporario = tempfile.mkstemp(prefix="ops-", suffix=".csv")
+        os.close(fd)
+        try:
+            n_ops, linhas = exportar_csv(
+                temporario,
+                _inteiros(consulta["ops"]) if consulta.get("ops") else None,
+                _data(consulta.get("de"), "data inicial"),
+                _data(consulta.get("ate"), "data final"),
+                consulta.get("layout", LAYOUT_LONGO),
+            )
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv; charset=utf-8")
+            self.send_header("Content-Length", str(os.path.getsize(temporario)))
+            self.send_header("X-OPs", str(n_ops))
+            self.send_header("X-Linhas", str(linhas))
+            self.end_headers()
+            with open(temporario, "rb") as f:
+                while True:
+                    bloco = f.read(BLOCO_DOWNLOAD)
+                    if not bloco:
+                        break
+                    self.wfile.write(bloco)
+        finally:
+            os.remove(temporario)
+
+
+def _so_local(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def criar_servidor(
+    host: str = HOST_PADRAO, porta: int = PORTA_PADRAO, token: Optional[str] = None
+) -> ThreadingHTTPServer:
+    """Servidor pronto para ``serve_forever()`` sobre ``banco.DATABASE_PATH`` (já migrado).
+
+    Fora do loopback o ``token`` é obrigatório (ValueError sem ele).
+    """
+    if not token and not _so_local(host):
+        raise ValueError(
+            f"Servir em {host} expõe o banco à rede: defina um token (--token ou {VARIAVEL_TOKEN})."
+        )
+    criar_banco()
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorOPs)
+    servidor.daemon_threads = True
+    servidor.token = token or None
+    return servidor
+
+# =================
+# Lado da interface
+# =================
+
+class ClienteAPI:
+    """Mesmas funções de ``banco`` usadas pelas telas, atendidas pelo servidor.
+
+    Erros de gravação por Nº de OP repetido chegam como ``sqlite3.IntegrityError``
+    (como no banco local); os demais, inclusive servidor fora do ar ou lento,
+    como ``ErroRequisicao`` (``codigo`` ``SEM_RESPOSTA`` quando não houve resposta).
+    """
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = TIMEOUT_CLIENTE_S):
+        self.url = url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def _abrir(self, metodo: str, caminho: str, corpo: Optional[Dict] = None, **consulta):
+        consulta = {k: v for k, v in consulta.items() if v is not None}
+        url = self.url + caminho + ("?" + urlencode(consulta) if consulta else "")
+        dados = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+        req = Request(url, data=dados, method=metodo)
+        if dados is not None:
+            req.add_header("Content-Type", "application/json")
+        if self.token:
+            req.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            return urlopen(req, timeout=self.timeout)
+        except HTTPError as e:
+            try:
+                mensagem = json.loads(e.read()).get("erro", str(e))
+            except ValueError:
+                mensagem = str(e)
+            if e.code == 409:
+                raise sqlite3.IntegrityError(mensagem) from None
+            raise ErroRequisicao(e.code, f"Servidor: {mensagem}") from None
+        except _ERROS_DE_REDE as e:
+            raise self._sem_resposta(e) from None
+
+    def _sem_resposta(self, erro: BaseException) -> ErroRequisicao:
+        motivo = getattr(erro, "reason", None) or erro
+        return ErroRequisicao(SEM_RESPOSTA, f"Servidor {self.url} indisponível: {motivo}")
+
+    def _ler(self, resposta, tamanho: int = -1) -> bytes:
+        try:
+            return resposta.read(tamanho)
+        except _ERROS_DE_REDE as e:
+            raise self._sem_resposta(e) from None
+
+    def _json(self, metodo: str, caminho: str, corpo: Optional[Dict] = None, **consulta) -> Dict:
+        with self._abrir(metodo, caminho, corpo, **consulta) as resposta:
+            dados = self._ler(resposta)
+        try:
+            return json.loads(dados)
+        except ValueError:
+            raise ErroRequisicao(SEM_RESPOSTA, f"Resposta inválida do servidor {self.url}") from None
+
+    # ---- OPs ----
+    def listar_ops(
+        self,
+        filtro: str = "",
+        limite: Optional[int] = None,
+        deslocamento: int = 0,
+        ordem: Optional[str] = None,
+        decrescente: bool = True,
+        apos: Optional[Tuple] = None,
+    ) -> List[Tuple]:
+        r = self._json(
+            "GET", "/ops", filtro=filtro, limite=limite, deslocamento=deslocamento, ordem=ordem,
+            desc="1" if decrescente else "0", apos=json.dumps(list(apos)) if apos is not None else None,
+        )
+        return [tuple(linha) for linha in r["ops"]]
+
+    def progresso_ops(self, op_ids: Sequence[int]) -> Dict[int, Tuple[int, int]]:
+        if not op_ids:
+            return {}
+        r = self._json("GET", "/ops/progresso", ids=",".join(map(str, op_ids)))
+        return {int(k): tuple(v) for k, v in r["progresso"].items()}
+
+    def criar_op(self, cliente: str, num_op: int, total_pares: int, tipo: str) -> int:
+        corpo = {"cliente": cliente, "num_op": num_op, "total_pares": total_pares, "tipo": tipo}
+        return self._json("POST", "/ops", corpo)["id"]
+
+    def carregar_op_completa(self, op_id: int) -> Optional[OPCarregada]:
+        try:
+            r = self._json("GET", f"/ops/{op_id}")
+        except ErroRequisicao as e:
+            if e.codigo == 404:  # apagada (talvez por outra estação)
+                return None
+            raise
+        giros = {
+            int(g): TaloesGiro(array("H", d["taloes"]), array("H", d["qtd"])) for g, d in r["giros"].items()
+        }
+        status = {(g, t): (s, momento) for g, t, s, momento in r["status"]}
+        return OPCarregada(tuple(r["cabecalho"]), giros, status)
+
+    def excluir_op(self, op_id: int) -> None:
+        self._json("DELETE", f"/ops/{op_id}")
+
+    def salvar_taloes(self, op_id: int, alteracoes: Dict[Celula, int]) -> int:
+        if not alteracoes:
+            return 0
+        corpo = {"alteracoes": [[g, t, tam, qtd] for (g, t, tam), qtd in alteracoes.items()]}
+        return self._json("PUT", f"/ops/{op_id}/taloes", corpo)["gravadas"]
+
+    def definir_status_talao(self, op_id: int, giro: int, talao_num: int, status: str) -> str:
+        corpo = {"giro": giro, "talao": talao_num, "status": status}
+        return self._json("PUT", f"/ops/{op_id}/status", corpo)["momento"]
+
+    def painel_producao(self) -> Painel:
+        r = self._json("GET", "/painel")
+        return Painel(**{
+            campo: [tuple(linha) for linha in valor] if isinstance(valor, list) else valor
+            for campo, valor in r.items()
+        })
+
+    def exportar_csv(
+        self,
+        caminho: str,
+        op_ids: Optional[Sequence[int]] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        layout: str = "longo",
+        progresso=None,
+    ) -> Tuple[int, int]:
+        """Como ``exportacao.exportar_csv``: baixa o CSV gerado no servidor, com escrita atômica."""
+        from exportacao import ExportacaoCancelada, aplicar_permissoes_padrao
+
+        ops = ",".join(map(str, op_ids)) if op_ids else None
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        fd, temporario = tempfile.mkstemp(prefix=".exportando-", suffix=".csv", dir=pasta)
+        try:
+            with os.fdopen(fd, "wb") as f, self._abrir(
+                "GET", "/exportar", ops=ops, de=data_inicio, ate=data_fim, layout=layout
+            ) as resposta:
+                n_ops = int(resposta.headers.get("X-OPs", 0))
+                linhas = int(resposta.headers.get("X-Linhas", 0))
+                recebidas = 0
+                while True:
+                    bloco = self._ler(resposta, BLOCO_DOWNLOAD)
+                    if not bloco:
+                        break
+                    f.write(bloco)
+                    recebidas += bloco.count(b"\n")
+                    if progresso and progresso(0, n_ops, min(recebidas, linhas)) is False:
+                        raise ExportacaoCancelada()
+            if progresso:
+                progresso(n_ops, n_ops, linhas)
+            aplicar_permissoes_padrao(temporario)
+            os.replace(temporario, caminho)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        return n_ops, linhas
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve o banco de OPs para as estações da rede local.")
+    parser.add_argument("--banco", default=banco.DATABASE_PATH)
+    parser.add_argument("--host", default=HOST_PADRAO, help="interface de escuta (0.0.0.0 = toda a rede)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument(
+        "--token", default=os.environ.get(VARIAVEL_TOKEN), help=f"segredo das estações (padrão: ${VARIAVEL_TOKEN})"
+    )
+    args = parser.parse_args(argv)
+
+    banco.DATABASE_PATH = args.banco
+    try:
+        servidor = criar_servidor(args.host, args.porta, args.token)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Servindo {os.path.abspath(args.banco)} em http://{args.host}:{args.porta} (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        fechar_conexoes()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
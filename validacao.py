@@ -0,0 +1,86 @@
+"""
+Validação de OPs
+----------------
+Regras conferidas sobre os dados em memória (TaloesGiro), nunca sobre widgets:
+- cada talão deve somar exatamente PARES_POR_TALAO;
+- a soma da OP deve bater com o total de pares informado (ops.total_pares);
+- só tamanhos da grade do tipo (Masculino/Feminino) podem ter pares.
+
+Só a soma do talão impede a gravação; total e grade são avisos (OPs acima do
+que ``planejar_taloes`` distribui e OPs antigas com pares em toda a numeração
+precisam continuar editáveis).
+
+``validar_op`` devolve todas as violações de uma vez; não importa Qt.
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+
+from banco import GRADES, GRADE_PADRAO, PARES_POR_TALAO, TAMANHOS, TaloesGiro
+
+SOMA_TALAO = "soma_talao"
+TOTAL_OP = "total_op"
+FORA_DA_GRADE = "fora_da_grade"
+REGRAS_BLOQUEANTES = {SOMA_TALAO}
+
+
+class Violacao(NamedTuple):
+    regra: str
+    mensagem: str
+    giro: Optional[int] = None
+    talao_num: Optional[int] = None
+    tamanho: Optional[str] = None
+
+    @property
+    def bloqueia(self) -> bool:
+        """True se impede salvar a OP; as demais violações são avisos."""
+        return self.regra in REGRAS_BLOQUEANTES
+
+
+def colunas_fora_da_grade(tipo: str) -> List[int]:
+    """Índices (em TAMANHOS) dos tamanhos que não pertencem à grade do tipo."""
+    grade = {tam for tam, _ in GRADES.get(tipo, GRADES[GRADE_PADRAO])}
+    return [j for j, tam in enumerate(TAMANHOS) if tam not in grade]
+
+
+def validar_op(
+    giros: Dict[int, TaloesGiro],
+    total_pares: Optional[int] = None,
+    tipo: Optional[str] = None,
+    pares_por_talao: int = PARES_POR_TALAO,
+) -> List[Violacao]:
+    """Confere a OP inteira numa passada por giro e devolve todas as violações."""
+    violacoes: List[Violacao] = []
+    n = len(TAMANHOS)
+    fora = colunas_fora_da_grade(tipo) if tipo else []
+    total_op = 0
+
+    for giro in sorted(giros):
+        dados = giros[giro]
+        somas = dados.somas_linhas()
+        total_op += sum(somas)
+
+        for talao_num, soma in zip(dados.taloes, somas):
+            if soma != pares_por_talao:
+                violacoes.append(Violacao(
+                    SOMA_TALAO,
+                    f"Giro {giro}, Talão {talao_num} soma {soma} (deve somar {pares_por_talao}).",
+                    giro, talao_num,
+                ))
+
+        for j in fora:
+            coluna = dados.qtd[j::n]
+            if not any(coluna):
+                continue
+            for r, qtd in enumerate(coluna):
+                if qtd:
+                    violacoes.append(Violacao(
+                        FORA_DA_GRADE,
+                        f"Giro {giro}, Talão {dados.taloes[r]}: tamanho {TAMANHOS[j]} fora da grade {tipo}.",
+                        giro, dados.taloes[r], TAMANHOS[j],
+                    ))
+
+    if total_pares is not None and total_op != total_pares:
+        violacoes.append(Violacao(
+            TOTAL_OP, f"A OP soma {total_op} pares, mas o total informado é {total_pares}."
+        ))
+    return violacoes